@@ -1,109 +1,75 @@
 import time
-import keyboard
+PROCESS_START = time.perf_counter()
 import traceback
 import sys
 import os
 from pathlib import Path
 import threading
-import tkinter as tk
-from tkinter import scrolledtext, ttk
 import json
-
-# Fix for PyInstaller: Patch vgamepad DLL path before import
-if getattr(sys, 'frozen', False):
-    # Running as PyInstaller bundle - patch the path before vgamepad loads the DLL
-    base_path = sys._MEIPASS
-    dll_path_64 = os.path.join(base_path, 'vgamepad', 'win', 'vigem', 'client', 'x64', 'ViGEmClient.dll')
-    dll_path_86 = os.path.join(base_path, 'vgamepad', 'win', 'vigem', 'client', 'x86', 'ViGEmClient.dll')
-    
-    # Add DLL directory to PATH for dependencies
-    if os.path.exists(dll_path_64):
-        dll_dir = os.path.dirname(dll_path_64)
-        os.environ['PATH'] = dll_dir + os.pathsep + os.environ.get('PATH', '')
-        # Monkey-patch Path.__file__ resolution for vigem_client
-        import importlib.util
-        import types
-        # Create a mock module to intercept the DLL path
-        original_path_init = Path.__init__
-        def patched_path_init(self, *args, **kwargs):
-            if len(args) > 0 and isinstance(args[0], str) and 'vigem' in args[0] and 'client' in args[0]:
-                # This is the DLL path construction - replace it
-                if os.path.exists(dll_path_64):
-                    return original_path_init(self, dll_path_64, **kwargs)
-                elif os.path.exists(dll_path_86):
-                    return original_path_init(self, dll_path_86, **kwargs)
-            return original_path_init(self, *args, **kwargs)
-        
-        # Actually, better approach: patch after import but before DLL load
-        # We'll do this differently - patch the module after it's imported
-
-import vgamepad as vg
-
-# Patch the DLL path after import if running as frozen
-if getattr(sys, 'frozen', False):
-    try:
-        import vgamepad.win.vigem_client as vigem_mod
-        # The DLL is already loaded, but we can try to reload with correct path
+import math
+import itertools
+import hashlib
+from array import array
+import heapq
+import atexit
+from collections import Counter
+
+# The GUI modules (tkinter, keyboard) and vgamepad are imported on first use,
+# so the command-line tools start without them (see load_gui_modules and
+# import_vgamepad)
+tk = scrolledtext = ttk = None
+keyboard = None
+vg = None
+
+# Seconds from startup to the first gamepad report that `ac_type.py type` aims for
+STARTUP_BUDGET = 0.25
+
+def load_gui_modules():
+    """Import tkinter and keyboard for the GUI and global hotkeys"""
+    global tk, scrolledtext, ttk, keyboard
+    import tkinter
+    from tkinter import scrolledtext as tk_scrolledtext, ttk as tk_ttk
+    import keyboard as keyboard_module
+    tk, scrolledtext, ttk = tkinter, tk_scrolledtext, tk_ttk
+    keyboard = keyboard_module
+
+def import_vgamepad():
+    """Import vgamepad, pointing it at the bundled ViGEmClient.dll when frozen"""
+    global vg
+    if vg is not None:
+        return vg
+
+    # Fix for PyInstaller: add the bundled DLL directory to PATH for dependencies
+    frozen = getattr(sys, 'frozen', False)
+    if frozen:
         dll_path_64 = os.path.join(sys._MEIPASS, 'vgamepad', 'win', 'vigem', 'client', 'x64', 'ViGEmClient.dll')
         dll_path_86 = os.path.join(sys._MEIPASS, 'vgamepad', 'win', 'vigem', 'client', 'x86', 'ViGEmClient.dll')
         if os.path.exists(dll_path_64):
-            vigem_mod.pathClient = Path(dll_path_64)
-        elif os.path.exists(dll_path_86):
-            vigem_mod.pathClient = Path(dll_path_86)
-    except:
-        pass
+            dll_dir = os.path.dirname(dll_path_64)
+            os.environ['PATH'] = dll_dir + os.pathsep + os.environ.get('PATH', '')
+
+    import vgamepad
+
+    # Patch the DLL path after import if running as frozen
+    if frozen:
+        try:
+            import vgamepad.win.vigem_client as vigem_mod
+            if os.path.exists(dll_path_64):
+                vigem_mod.pathClient = Path(dll_path_64)
+            elif os.path.exists(dll_path_86):
+                vigem_mod.pathClient = Path(dll_path_86)
+        except:
+            pass
+    vg = vgamepad
+    return vg
 
 # Text will be set from GUI input field
 text = ""
 
-# Define keyboard layouts - German version
-layout_upper_de = [
-    ["1","2","3","4","5","6","7","8","9","0"],
-    ["q","w","e","r","t","z","u","i","o","p"],
-    ["a","s","d","f","g","h","j","k","l"],
-    ["y","x","c","v","b","n","m","ä","ü","ö"]
-]
-
-layout_lower_de = [
-    ["ä","ö","ü","ß","?","!","ß",None,None,None],
-    ["q","w","e","r","t","z","u","i","o","p"],
-    ["a","s","d","f","g","h","j","k","l","´"],
-    ["y","x","c","v","b","n","m",",",".",None]
-]
-
-layout_symbols_de = [
-    ["#","?","\"","-","~",None,None,";",":",","],
-    ["%","&","@","_",None,"/",":","x",None,"="],
-    ["(",")","<",">",None,None,None,"+",None,None],
-    ["ß",None,None,None,None,None,None,",",".",None]
-]
-
-# Define keyboard layouts - English version
-layout_upper_en = [
-    ["1","2","3","4","5","6","7","8","9","0"],
-    ["q","w","e","r","t","y","u","i","o","p"],
-    ["a","s","d","f","g","h","j","k","l"],
-    ["z","x","c","v","b","n","m",",","."]
-]
-
-layout_lower_en = [
-    ["!","?","\"","-","~","—","'",";",":",None],
-    ["q","w","e","r","t","y","u","i","o","p"],
-    ["a","s","d","f","g","h","j","k","l"],
-    ["z","x","c","v","b","n","m",",","."]
-]
-
-layout_symbols_en = [
-    ["#","?","\"","-","~","_",".",";",":","æ",None,None],
-    ["%","&","@",None,"_","/","!","x","÷","=",None,None],
-    ["(",")","<",">","»","«","≡","Ξ","+",None,None,None],
-    ["β","þ","ð","§","||","μ","¬",None,",",".",None,None]
-]
-
-# Default to German layouts (backward compatibility)
-layout_upper = layout_upper_de
-layout_lower = layout_lower_de
-layout_symbols = layout_symbols_de
+# Keyboard layouts come from layout packs (see "# Layout packs"); these are
+# the pages of the active one. Pages without a grid, like the emoji page, are
+# empty lists.
+layout_pages = {}
 
 # Language setting (default: "english")
 current_language = "english"
@@ -122,25 +88,39 @@ ERROR_COLOR = "#FF6B6B"
 STOP_COLOR = "#F26868"
 STOP_COLOR_DARK = "#C75050"
 
+# How often the GUI samples the typing progress
+PROGRESS_REFRESH_MS = 250
+
 def set_language(lang):
-    """Switch between German and English keyboard layouts"""
-    global layout_upper, layout_lower, layout_symbols, current_language, current_layout
+    """Switch to the keyboard layouts of a layout pack ("german", "english", ...)"""
+    global current_language
+    if lang not in layout_packs:
+        print(f"Warning: Unknown keyboard language '{lang}', using 'german'")
+        lang = "german"
     current_language = lang
-    if lang == "english":
-        layout_upper = layout_upper_en
-        layout_lower = layout_lower_en
-        layout_symbols = layout_symbols_en
-    else:  # german
-        layout_upper = layout_upper_de
-        layout_lower = layout_lower_de
-        layout_symbols = layout_symbols_de
-    # Update current layout if needed
-    if current_layout == layout_upper_de or current_layout == layout_upper_en:
-        current_layout = layout_upper
-    elif current_layout == layout_lower_de or current_layout == layout_lower_en:
-        current_layout = layout_lower
-    elif current_layout == layout_symbols_de or current_layout == layout_symbols_en:
-        current_layout = layout_symbols
+    activate_layout_pack(layout_packs[lang])
+
+def get_layout(name):
+    """Return the grid for a page name ("upper", "lower", "symbols", "emoji", ...) in the active language"""
+    return layout_pages.get(name, [])
+
+# Character lookup table for the active language: char -> [(layout, row, col), ...]
+char_index = {}
+
+# Cached stick routes: (layout, from_row, from_col, to_row, to_col) -> runs
+route_cache = {}
+
+# Cached layout switches: (from_layout, to_layout) -> buttons
+transition_cache = {}
+
+# Guards both caches, which the job server's pad threads share
+cache_lock = threading.Lock()
+
+def clear_route_caches():
+    """Forget cached routes and layout switches after a setting they depend on changes"""
+    with cache_lock:
+        route_cache.clear()
+        transition_cache.clear()
 
 # Timing for faster input
 BASE_MOVE_HOLD = 0.05
@@ -152,23 +132,86 @@ BASE_TRIGGER_SETTLE = 0.04
 BASE_LAYOUT_SETTLE = 0.12
 BASE_POLL_INTERVAL = 0.01
 
+# The game's stick auto-repeat: delay before the second move of a held stick,
+# then the time between further moves. These are fixed by the game and are not
+# affected by speed_scale; set "repeat_delay"/"repeat_interval" in the config
+# to calibrate them.
+REPEAT_DELAY = 0.25
+REPEAT_INTERVAL = 0.05
+
+# Frame-quantized timing ("frame_sync"/"frame_rate" config options). Dolphin
+# polls input once per frame, so in this mode every hold and settle is
+# rounded up to whole frames at FRAME_RATE: the fewest frames that still
+# cover its time in seconds. The frame grid starts at the first input of a
+# run; it is not synchronized to the game's actual frames.
+
+FRAME_RATES = (60, 50, 30)
+frame_sync = False
+FRAME_RATE = 60
+
+# Per-action base timings in seconds from a calibrated timing profile (see
+# calibrate_timing). Keys missing from the profile use the BASE_* values.
+TIMING_PROFILE_KEYS = (
+    "move_hold", "move_settle", "button_hold", "button_settle",
+    "trigger_hold", "trigger_settle", "y_hold", "y_settle", "lt_hold", "lt_settle",
+)
+timing_profile = {}
+
 speed_scale = 1.0
 
 def apply_speed_scale():
     """Apply the current speed scale to all timing values."""
     global MOVE_HOLD, MOVE_SETTLE, BUTTON_HOLD, BUTTON_SETTLE
-    global TRIGGER_HOLD, TRIGGER_SETTLE, LAYOUT_SETTLE, POLL_INTERVAL
+    global TRIGGER_HOLD, TRIGGER_SETTLE, POLL_INTERVAL
+    global Y_HOLD, Y_SETTLE, LT_HOLD, LT_SETTLE
 
     delay_scale = 1.0 / max(speed_scale, 0.01)
 
-    MOVE_HOLD = BASE_MOVE_HOLD * delay_scale
-    MOVE_SETTLE = BASE_MOVE_SETTLE * delay_scale
-    BUTTON_HOLD = BASE_BUTTON_HOLD * delay_scale
-    BUTTON_SETTLE = BASE_BUTTON_SETTLE * delay_scale
-    TRIGGER_HOLD = BASE_TRIGGER_HOLD * delay_scale
-    TRIGGER_SETTLE = BASE_TRIGGER_SETTLE * delay_scale
-    LAYOUT_SETTLE = BASE_LAYOUT_SETTLE * delay_scale
-    POLL_INTERVAL = BASE_POLL_INTERVAL * delay_scale
+    def timing(seconds):
+        seconds *= delay_scale
+        if frame_sync:
+            # Round up so a hold never drops below its time in seconds
+            return max(1, math.ceil(seconds * FRAME_RATE - 1e-6)) / FRAME_RATE
+        return seconds
+
+    base = base_timings()
+    # A stick pulse held until the game's auto-repeat starts would move twice,
+    # so keep the same margin before it that hold_duration leaves
+    longest_pulse = REPEAT_DELAY - REPEAT_INTERVAL / 2
+    if frame_sync:
+        longest_pulse = math.floor(longest_pulse * FRAME_RATE + 1e-6) / FRAME_RATE
+    MOVE_HOLD = min(timing(base["move_hold"]), longest_pulse)
+    MOVE_SETTLE = timing(base["move_settle"])
+    BUTTON_HOLD = timing(base["button_hold"])
+    BUTTON_SETTLE = timing(base["button_settle"])
+    TRIGGER_HOLD = timing(base["trigger_hold"])
+    TRIGGER_SETTLE = timing(base["trigger_settle"])
+    Y_HOLD = timing(base["y_hold"])
+    Y_SETTLE = timing(base["y_settle"])
+    LT_HOLD = timing(base["lt_hold"])
+    LT_SETTLE = timing(base["lt_settle"])
+    # Not part of timing profiles: the pause between characters isn't a game minimum
+    POLL_INTERVAL = timing(BASE_POLL_INTERVAL)
+    # Route choice depends on the timing once hold-to-repeat is enabled
+    clear_route_caches()
+
+def set_timing_profile(timings):
+    """Use per-action base timings (seconds at speed 1.0) and reapply timing values"""
+    global timing_profile
+    timing_profile = {key: float(value) for key, value in (timings or {}).items() if key in TIMING_PROFILE_KEYS}
+    apply_speed_scale()
+
+def base_timings():
+    """The base value (seconds at speed 1.0) of every profile timing currently in use"""
+    defaults = {
+        "move_hold": BASE_MOVE_HOLD, "move_settle": BASE_MOVE_SETTLE,
+        "button_hold": BASE_BUTTON_HOLD, "button_settle": BASE_BUTTON_SETTLE,
+        "trigger_hold": BASE_TRIGGER_HOLD, "trigger_settle": BASE_TRIGGER_SETTLE,
+        "y_hold": BASE_BUTTON_HOLD, "y_settle": BASE_LAYOUT_SETTLE,
+        "lt_hold": BASE_BUTTON_HOLD, "lt_settle": BASE_LAYOUT_SETTLE,
+    }
+    defaults.update(timing_profile)
+    return defaults
 
 def set_speed(scale):
     """Update the global speed scale and reapply timing values."""
@@ -176,279 +219,1910 @@ def set_speed(scale):
     speed_scale = max(0.1, float(scale))
     apply_speed_scale()
 
+def set_frame_sync(enabled, frame_rate=None):
+    """Switch between timing in seconds and timing in whole frames"""
+    global frame_sync, FRAME_RATE
+    frame_sync = bool(enabled)
+    if frame_rate is not None:
+        frame_rate = int(frame_rate)
+        if frame_rate not in FRAME_RATES:
+            print(f"Warning: Unsupported frame rate {frame_rate}, using {FRAME_RATE} Hz")
+        else:
+            FRAME_RATE = frame_rate
+    apply_speed_scale()
+
 apply_speed_scale()
 
-cursor_row = 0
-cursor_col = 0
+# Input timing
+class DeadlineScheduler:
+    """Paces gamepad reports on a time.perf_counter() timeline.
+
+    Holds and settles are never cut short: a wait ends `duration` after the
+    previous deadline or after now, whichever is later, so a late wakeup
+    delays the following input instead of shortening it. Only slack waits
+    (catch_up=True, like the pause between characters) count from the
+    previous deadline even when it has passed, which absorbs earlier
+    lateness. Waits sleep until shortly before the deadline and spin for the
+    rest; the sleep margin follows the overshoot measured on this machine. If
+    typing stalls for longer than MAX_LAG the timeline restarts from the
+    current time. With frame_period set, deadlines are rounded up to a grid
+    of that period starting at the timeline's first wait.
+    """
+
+    SPIN_TIME = 0.0005
+    MAX_LAG = 0.25
+
+    def __init__(self, clock=time.perf_counter, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.spin = True
+        self.overshoot = 0.001
+        self.frame_period = None
+        self.start()
+
+    def use_clock(self, clock, sleep, spin=True):
+        """Pace waits with another clock, e.g. a simulator's virtual time.
+
+        Virtual clocks only advance when slept on, so they must use spin=False.
+        """
+        self.clock = clock
+        self.sleep = sleep
+        self.spin = spin
+        self.start()
+
+    def start(self):
+        """Begin a new timeline and clear the timing statistics"""
+        self.deadline = None
+        self.started = None
+        self.target_time = 0.0
+        self.waits = 0
+        self.late_total = 0.0
+        self.late_max = 0.0
+        self.resyncs = 0
+
+    def wait(self, duration, catch_up=False):
+        """Wait `duration` seconds after the later of the previous deadline and now.
+
+        With catch_up the wait ends `duration` after the previous deadline
+        even if that has passed, returning at once when running behind.
+        """
+        now = self.clock()
+        if self.deadline is None or now - self.deadline > self.MAX_LAG:
+            if self.deadline is not None:
+                self.resyncs += 1
+            if self.started is None:
+                self.started = now
+            self.deadline = now
+        if catch_up:
+            self.deadline += duration
+        else:
+            self.deadline = max(self.deadline, now) + duration
+        if self.frame_period:
+            frames = math.ceil((self.deadline - self.started) / self.frame_period - 1e-6)
+            self.deadline = self.started + frames * self.frame_period
+        self.target_time += duration
+        self.waits += 1
+
+        if not self.spin:
+            if self.deadline > now:
+                self.sleep(self.deadline - now)
+            return
+
+        coarse = self.deadline - now - self.overshoot - self.SPIN_TIME
+        if coarse > 0:
+            before = self.clock()
+            self.sleep(coarse)
+            overshoot = max(0.0, self.clock() - before - coarse)
+            self.overshoot += 0.1 * (overshoot - self.overshoot)
+        while self.clock() < self.deadline:
+            pass
+
+        late = self.clock() - self.deadline
+        self.late_total += late
+        self.late_max = max(self.late_max, late)
+
+    def report(self):
+        """Achieved vs. target timing for the current timeline"""
+        actual = self.clock() - self.started if self.started is not None else 0.0
+        return {
+            "target": self.target_time,
+            "actual": actual,
+            "waits": self.waits,
+            "late_avg": self.late_total / self.waits if self.waits else 0.0,
+            "late_max": self.late_max,
+            "resyncs": self.resyncs,
+        }
+
+# Gamepad backends
+class GamepadBackend:
+    """Report-level gamepad interface used by the control functions.
+
+    The setters change the pending report and update() sends it. Buttons are
+    named "A", "B", "X", "Y" and "START". Backends with their own time base
+    (like the simulator) provide clock() and sleep() for the scheduler.
+    """
+
+    connect_message = "Gamepad registered."
+    clock = None
+    sleep = None
+
+    def left_joystick(self, x_value, y_value):
+        raise NotImplementedError
+
+    def press_button(self, button):
+        raise NotImplementedError
+
+    def release_button(self, button):
+        raise NotImplementedError
+
+    def left_trigger(self, value):
+        raise NotImplementedError
+
+    def right_trigger(self, value):
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+    def update(self):
+        raise NotImplementedError
+
+class VGamepadBackend(GamepadBackend):
+    """Virtual Xbox 360 controller through vgamepad and the ViGEmBus driver"""
+
+    connect_message = "Gamepad registered - Dolphin can now see it as XInput/0/Gamepad!"
+
+    def __init__(self):
+        try:
+            import_vgamepad()
+        except ImportError:
+            raise RuntimeError("vgamepad is not installed (pip install vgamepad)")
+        self.pad = vg.VX360Gamepad()
+        self.buttons = {
+            "A": vg.XUSB_BUTTON.XUSB_GAMEPAD_A,
+            "B": vg.XUSB_BUTTON.XUSB_GAMEPAD_B,
+            "X": vg.XUSB_BUTTON.XUSB_GAMEPAD_X,
+            "Y": vg.XUSB_BUTTON.XUSB_GAMEPAD_Y,
+            "START": vg.XUSB_BUTTON.XUSB_GAMEPAD_START,
+        }
+
+    def left_joystick(self, x_value, y_value):
+        self.pad.left_joystick(x_value, y_value)
+
+    def press_button(self, button):
+        self.pad.press_button(button=self.buttons[button])
 
-current_layout = layout_lower
-is_upper = False
-is_lower = True
-is_symbol = False
+    def release_button(self, button):
+        self.pad.release_button(button=self.buttons[button])
 
-# Gamepad initialization - will be connected in GUI
-gamepad = None
-gamepad_connected = False
+    def left_trigger(self, value):
+        self.pad.left_trigger(value=value)
 
-def init_gamepad():
-    """Initialize and register the virtual gamepad with the system"""
-    global gamepad, gamepad_connected
+    def right_trigger(self, value):
+        self.pad.right_trigger(value=value)
+
+    def reset(self):
+        self.pad.reset()
+
+    def update(self):
+        self.pad.update()
+
+def create_gamepad():
+    """Create the vgamepad backend, exiting with an error log if that fails"""
     try:
-        if gamepad is None:
-            gamepad = vg.VX360Gamepad()
-        
-        if not gamepad_connected:
-            # vgamepad automatically connects when created
-            # Send an initial update to register it with the system
-            # This makes it visible to Dolphin and other applications
-            gamepad.reset()
-            gamepad.update()
-            gamepad_connected = True
-            print("Gamepad registered - Dolphin can now see it as XInput/0/Gamepad!")
-        return True
+        engine.set_backend(VGamepadBackend())
+        print("Gamepad initialized (not yet connected).")
     except Exception as e:
-        error_msg = f"ERROR registering gamepad:\n{str(e)}\n\nFull traceback:\n{traceback.format_exc()}"
+        error_msg = f"ERROR initializing gamepad:\n{str(e)}\n\nFull traceback:\n{traceback.format_exc()}"
         print(error_msg)
-        gamepad_connected = False
-        return False
+        with open("ac_type_error.log", "w", encoding="utf-8") as f:
+            f.write(error_msg)
+        print("\nError has been saved to 'ac_type_error.log'.")
+        print("\nPress any key to exit...")
+        try:
+            input()
+        except:
+            time.sleep(5)
+        sys.exit(1)
 
-def disconnect_gamepad():
-    """Disconnect the virtual gamepad"""
-    global gamepad_connected
-    try:
-        if gamepad is not None and gamepad_connected:
-            # Reset gamepad state
-            gamepad.reset()
-            gamepad.update()
-            # Note: vgamepad doesn't have explicit disconnect, it disconnects on cleanup
-            gamepad_connected = False
-            print("Gamepad disconnected.")
-    except Exception as e:
-        print(f"Error disconnecting gamepad: {e}")
+# Report coalescing ("coalesce_reports" config option): an input's release is
+# held back and sent in the same report as the next input's press when that
+# uses another channel, so the settle overlaps the next hold.
+coalesce_reports = False
 
-# Initialize gamepad (but don't connect yet - will connect in GUI)
-try:
-    gamepad = vg.VX360Gamepad()
-    print("Gamepad initialized (not yet connected).")
-except Exception as e:
-    error_msg = f"ERROR initializing gamepad:\n{str(e)}\n\nFull traceback:\n{traceback.format_exc()}"
-    print(error_msg)
-    with open("ac_type_error.log", "w", encoding="utf-8") as f:
-        f.write(error_msg)
-    print("\nError has been saved to 'ac_type_error.log'.")
-    print("\nPress any key to exit...")
-    try:
-        input()
-    except:
-        time.sleep(5)
-    sys.exit(1)
-
-# Control functions
-def move_up():
-    gamepad.left_joystick(0, 32767)
-    gamepad.update()
-    time.sleep(MOVE_HOLD)
-    gamepad.left_joystick(0, 0)
-    gamepad.update()
-    time.sleep(MOVE_SETTLE)
-
-def move_down():
-    gamepad.left_joystick(0, -32768)
-    gamepad.update()
-    time.sleep(MOVE_HOLD)
-    gamepad.left_joystick(0, 0)
-    gamepad.update()
-    time.sleep(MOVE_SETTLE)
-
-def move_left():
-    gamepad.left_joystick(-32768, 0)
-    gamepad.update()
-    time.sleep(MOVE_HOLD)
-    gamepad.left_joystick(0, 0)
-    gamepad.update()
-    time.sleep(MOVE_SETTLE)
-
-def move_right():
-    gamepad.left_joystick(32767, 0)
-    gamepad.update()
-    time.sleep(MOVE_HOLD)
-    gamepad.left_joystick(0, 0)
-    gamepad.update()
-    time.sleep(MOVE_SETTLE)
-
-def press_A():
-    gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_A)
-    gamepad.update()
-    time.sleep(BUTTON_HOLD)
-    gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_A)
-    gamepad.update()
-    time.sleep(BUTTON_SETTLE)
-
-def press_space():
-    gamepad.right_trigger(value=255)
-    gamepad.update()
-    time.sleep(TRIGGER_HOLD)
-    gamepad.right_trigger(value=0)
-    gamepad.update()
-    time.sleep(TRIGGER_SETTLE)
-
-def press_Y():
-    gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_Y)
-    gamepad.update()
-    time.sleep(BUTTON_HOLD)
-    gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_Y)
-    gamepad.update()
-    time.sleep(LAYOUT_SETTLE)
-
-def press_LT():
-    gamepad.left_trigger(value=255)
-    gamepad.update()
-    time.sleep(BUTTON_HOLD)
-    gamepad.left_trigger(value=0)
-    gamepad.update()
-    time.sleep(LAYOUT_SETTLE)
+def set_coalesce_reports(enabled):
+    """Enable or disable report coalescing"""
+    global coalesce_reports
+    coalesce_reports = bool(enabled)
 
 def wait_for_release(key):
     while keyboard.is_pressed(key):
         time.sleep(0.05)
 
 # Cursor control
-def reset_cursor():
-    global cursor_row, cursor_col
-    for _ in range(5):
-        move_up()
-        move_left()
-    cursor_row = 0
-    cursor_col = 0
-
-def move_to(row, col):
-    global cursor_row, cursor_col
-    while cursor_row < row:
-        move_down()
-        cursor_row += 1
-    while cursor_row > row:
-        move_up()
-        cursor_row -= 1
-    while cursor_col < col:
-        move_right()
-        cursor_col += 1
-    while cursor_col > col:
-        move_left()
-        cursor_col -= 1
+# PadEngine method for a single stick move in each direction
+MOVES = {
+    (-1, 0): "move_up",
+    (1, 0): "move_down",
+    (0, -1): "move_left",
+    (0, 1): "move_right",
+}
+
+# Edge wrap-around per layout as (rows wrap, columns wrap), taken from the
+# layout pack. The GameCube keyboard stops at its edges - reset_cursor homes
+# by pushing against them - so its packs don't wrap; the "cursor_wrap" config
+# option turns wrapping on for every page.
+LAYOUT_WRAP = {}
+cursor_wrap = False
+
+# Combine row and column travel into diagonal stick moves ("diagonal_moves" config option)
+diagonal_moves = False
+
+# Hold the stick and let the game's auto-repeat do long runs ("hold_repeat" config option)
+hold_repeat = False
+
+def layout_wraps(name):
+    """Whether the cursor wraps around any edge of a page"""
+    return any(LAYOUT_WRAP.get(name, (False, False)))
+
+def set_cursor_wrap(enabled):
+    """Wrap on both axes for every layout, or only where the layout pack wraps"""
+    global cursor_wrap
+    cursor_wrap = bool(enabled)
+    apply_layout_wrap()
+
+def apply_layout_wrap():
+    LAYOUT_WRAP.clear()
+    for name in layout_pages:
+        LAYOUT_WRAP[name] = (True, True) if cursor_wrap else tuple(layout_pack["wrap"][name])
+    clear_route_caches()
+
+def set_hold_repeat(enabled, delay=None, interval=None):
+    """Enable or disable hold-to-repeat stick travel and optionally recalibrate it"""
+    global hold_repeat, REPEAT_DELAY, REPEAT_INTERVAL
+    hold_repeat = bool(enabled)
+    if delay is not None:
+        REPEAT_DELAY = max(0.0, float(delay))
+    if interval is not None:
+        REPEAT_INTERVAL = max(0.001, float(interval))
+    # The longest stick pulse depends on the repeat delay
+    apply_speed_scale()
+
+def hold_duration(steps):
+    """How long to hold the stick so the game's auto-repeat moves exactly `steps` cells.
+
+    The first move happens on deflection, the second after REPEAT_DELAY and
+    each further one REPEAT_INTERVAL later. Releasing halfway between the
+    last wanted move and the next one leaves the most margin for jitter. In
+    frame-sync mode the release has to fall on a whole frame, so the frame
+    nearest that point strictly between the two moves is used; None if no
+    frame falls between them.
+    """
+    if steps <= 1:
+        return MOVE_HOLD
+    last_move = REPEAT_DELAY + (steps - 2) * REPEAT_INTERVAL
+    hold = max(MOVE_HOLD, last_move + REPEAT_INTERVAL / 2)
+    if not frame_sync:
+        return hold
+    first = max(math.floor(last_move * FRAME_RATE + 1e-6) + 1, math.ceil(MOVE_HOLD * FRAME_RATE - 1e-6))
+    last = math.ceil((last_move + REPEAT_INTERVAL) * FRAME_RATE - 1e-6) - 1
+    if first > last:
+        return None
+    return min(range(first, last + 1), key=lambda frame: abs(frame / FRAME_RATE - hold)) / FRAME_RATE
+
+def use_hold(steps):
+    """Whether a straight run of `steps` moves is faster held than pulsed"""
+    if not hold_repeat or steps < 2:
+        return False
+    hold = hold_duration(steps)
+    return hold is not None and hold + MOVE_SETTLE < steps * (MOVE_HOLD + MOVE_SETTLE)
+
+def set_diagonal_moves(enabled):
+    """Enable or disable diagonal stick moves"""
+    global diagonal_moves
+    diagonal_moves = bool(enabled)
+    clear_route_caches()
+
+def _axis_options(start, target, size, wraps):
+    """Ways to travel along one axis as (direction, steps): direct, then wrapped"""
+    distance = target - start
+    if distance == 0:
+        return [(0, 0)]
+    direction = 1 if distance > 0 else -1
+    options = [(direction, abs(distance))]
+    if wraps and 0 <= start < size and 0 <= target < size:
+        options.append((-direction, size - abs(distance)))
+    return options
+
+def _diagonal_route_ok(grid, row, col, runs):
+    """Check that every diagonal step of a route lands on a key inside the grid.
+
+    Diagonals never wrap, and landing on a None hole or past the end of a
+    shorter row is refused so the tracked cursor can't drift from the game.
+    """
+    for d_row, d_col, steps in runs:
+        for _ in range(steps):
+            row += d_row
+            col += d_col
+            if d_row and d_col:
+                if not 0 <= row < len(grid) or not 0 <= col < len(grid[row]) or grid[row][col] is None:
+                    return False
+    return True
+
+def plan_route(layout_name, from_row, from_col, to_row, to_col):
+    """Return the fastest stick route between two cells as (d_row, d_col, steps) runs.
+
+    Rows and columns are each travelled either directly or across the edge
+    when the layout wraps. Rows have different lengths, so a horizontal wrap
+    is only used when both columns exist in the row it happens in. With
+    diagonal moves enabled, the overlapping part of a direct route is covered
+    by diagonal steps before or after the remaining straight run.
+    """
+    cache_key = (layout_name, from_row, from_col, to_row, to_col)
+    with cache_lock:
+        route = route_cache.get(cache_key)
+    if route is not None:
+        return route
+
+    grid = get_layout(layout_name)
+    wrap_rows, wrap_cols = LAYOUT_WRAP.get(layout_name, (False, False))
+    candidates = []
+    # Rows first (like the original straight walk), then columns first
+    for rows_first in (True, False):
+        col_row = to_row if rows_first else from_row
+        row_len = len(grid[col_row]) if 0 <= col_row < len(grid) else 0
+        for d_row, row_steps in _axis_options(from_row, to_row, len(grid), wrap_rows):
+            for d_col, col_steps in _axis_options(from_col, to_col, row_len, wrap_cols):
+                runs = [(d_row, 0, row_steps), (0, d_col, col_steps)]
+                if not rows_first:
+                    runs.reverse()
+                candidates.append(runs)
+
+    if diagonal_moves and from_row != to_row and from_col != to_col:
+        d_row = 1 if to_row > from_row else -1
+        d_col = 1 if to_col > from_col else -1
+        row_steps = abs(to_row - from_row)
+        col_steps = abs(to_col - from_col)
+        diagonal = (d_row, d_col, min(row_steps, col_steps))
+        rest = (d_row, 0, row_steps - diagonal[2]) if row_steps > col_steps else (0, d_col, col_steps - diagonal[2])
+        for runs in ([diagonal, rest], [rest, diagonal]):
+            if _diagonal_route_ok(grid, from_row, from_col, runs):
+                candidates.append(runs)
+
+    costs = action_costs()
+    best = None
+    for runs in candidates:
+        runs = [run for run in runs if run[2]]
+        cost = route_cost(runs, costs)
+        if best is None or cost < best[0]:
+            best = (cost, runs)
+    with cache_lock:
+        route_cache[cache_key] = best[1]
+    return best[1]
+
+def route_cost(route, costs=None):
+    """Time needed to travel a route, holding the stick for runs where that is faster"""
+    costs = costs or action_costs()
+    total = 0.0
+    for _, _, steps in route:
+        if use_hold(steps):
+            total += hold_duration(steps) + MOVE_SETTLE
+        else:
+            total += steps * costs["move"]
+    return total
+
+def _step_cursor(layout_name, row, col, d_row, d_col):
+    """Cursor position after one stick move, following edge wrap-around"""
+    grid = get_layout(layout_name)
+    row += d_row
+    col += d_col
+    if not 0 <= row < len(grid):
+        row %= len(grid)
+    if col < 0:
+        col = len(grid[row]) - 1
+    elif d_col > 0 and col == len(grid[row]):
+        col = 0
+    return row, col
 
 # Keyboard switching
-def switch_to_symbols():
-    global is_symbol, is_upper, is_lower, current_layout
-    if is_symbol:
-        return
-    if is_lower:
-        press_LT()
-        is_lower = False
-        is_upper = True
-        current_layout = layout_upper
-    elif not is_upper:
-        switch_to_upper()
-    press_Y()
-    current_layout = layout_symbols
-    is_symbol = True
-    is_upper = False
-    is_lower = False
-
-def switch_to_upper():
-    global is_symbol, is_upper, is_lower, current_layout
-    if is_upper:
-        return
-    if is_symbol:
-        press_Y()
-        is_symbol = False
-        is_lower = False
-        current_layout = layout_upper  # Emoji layout is skipped
-        press_Y()
-        current_layout = layout_lower
-        is_lower = True
-    if is_lower:
-        press_LT()
-    current_layout = layout_upper
-    is_upper = True
-    is_symbol = False
-    is_lower = False
-
-def switch_to_lower():
-    global is_symbol, is_upper, is_lower, current_layout
-    if is_symbol:
-        press_Y()
-        is_symbol = False
-        current_layout = layout_upper  # Emoji layout is skipped
-        press_Y()
-        current_layout = layout_lower
-        is_lower = True
-        is_upper = False
-        return
-    if is_upper:
-        press_LT()
-    current_layout = layout_lower
-    is_lower = True
-    is_symbol = False
-    is_upper = False
-
-# Type characters
-def type_char(ch, next_ch=None):
-    global current_layout, is_symbol, is_upper, is_lower
-    if ch == " ":
-        press_space()
-        return
-
-    # Check where the character exists
-    in_symbol = any(ch in row for row in layout_symbols)
-    is_digit = ch.isdigit()
-    is_letter = ch.isalpha()
-
-    # Choose target layout
-    if in_symbol:
-        switch_to_symbols()
-        layout = layout_symbols
-        lookup_ch = ch
-    elif is_letter and ch.islower():
-        switch_to_lower()
-        layout = layout_lower
-        lookup_ch = ch  # lower layout stores lowercase letters/special characters
-    elif is_letter and ch.isupper():
-        switch_to_upper()
-        layout = layout_upper
-        lookup_ch = ch.lower()  # Positions in our arrays are lowercase
-    elif is_digit:
-        switch_to_upper()
-        layout = layout_upper
-        lookup_ch = ch
-    else:
-        # Fallback: first symbols, then lowercase
-        switch_to_symbols()
-        layout = layout_symbols
-        lookup_ch = ch
-        if not any(lookup_ch in row for row in layout_symbols):
-            switch_to_lower()
-            layout = layout_lower
-            lookup_ch = ch
-
-    for r in range(len(layout)):
-        if lookup_ch in layout[r]:
-            c = layout[r].index(lookup_ch)
-            move_to(r, c)
-            press_A()
-            break
+# Page reached by pressing a button on each page of the in-game keyboard, from
+# the layout pack: {(page, button): page}. Layout switches are the shortest
+# walks along these edges (on the GameCube, leaving the symbols page takes two
+# Y presses because the emoji page sits between it and lowercase), and the
+# simulator follows them.
+PAGE_CYCLE = {}
+
+def layout_transition(from_layout, to_layout):
+    """Return the cheapest button presses that switch between two keyboard pages.
+
+    Presses are weighted by their current hold and settle time, with fewer
+    presses winning ties, so a calibrated Y or LT changes the choice.
+    """
+    key = (from_layout, to_layout)
+    with cache_lock:
+        buttons = transition_cache.get(key)
+    if buttons is not None:
+        return buttons
+    costs = action_costs()
+    queue = [(0.0, 0, from_layout, ())]
+    done = set()
+    while queue:
+        cost, presses, page, buttons = heapq.heappop(queue)
+        if page == to_layout:
+            with cache_lock:
+                transition_cache[key] = buttons
+            return buttons
+        if page in done:
+            continue
+        done.add(page)
+        for (source, button), target in PAGE_CYCLE.items():
+            if source == page and target not in done:
+                heapq.heappush(queue, (cost + costs[button], presses + 1, target, buttons + (button,)))
+    raise ValueError(f"Keyboard page {to_layout!r} can't be reached from {from_layout!r}")
+
+# Layout packs
+# A layout pack is a JSON file describing one game's keyboard:
+#   {"name": "german", "title": "German",
+#    "pages": {"symbols": [["#", "?", null, ...], ...], "lower": [...], "upper": [...]},
+#    "page_cycle": [["lower", "LT", "upper"], ["upper", "Y", "symbols"], ...],
+#    "wrap": false}
+# When a character is on several pages the planner picks the key that is
+# cheapest to reach (the page listed first wins ties), letters on a page
+# named "upper" are typed in uppercase and "wrap" is either
+# true/false or {page: [rows wrap, columns wrap]}. Pages only named in
+# page_cycle (like the emoji page) have no keys. Packs ship in layouts/ next
+# to the script and more can be put in LAYOUT_PACK_DIR; each file is compiled
+# once and the result cached in LAYOUT_CACHE_DIR under the hashes of its path
+# and its contents.
+BUNDLED_LAYOUT_DIR = Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parent)) / "layouts"
+LAYOUT_CACHE_FORMAT = 2  # Bump when the compiled form changes
+PAGE_BUTTONS = ("Y", "LT")
+
+layout_packs = {}  # name -> compiled pack
+layout_pack = None  # The active pack
+
+def _pack_wrap(value, page):
+    if isinstance(value, bool):
+        return [value, value]
+    if isinstance(value, list) and len(value) == 2 and all(isinstance(v, bool) for v in value):
+        return value
+    raise ValueError(f"wrap for page '{page}' must be true/false or [rows, columns]")
+
+def compile_layout_pack(data):
+    """Validate a layout pack and compile its character index.
+
+    Raises ValueError naming the first problem found.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    name = data.get("name")
+    if not isinstance(name, str) or not name:
+        raise ValueError('missing "name"')
+    pages = data.get("pages")
+    if not isinstance(pages, dict) or not pages:
+        raise ValueError('missing "pages"')
+    for page, grid in pages.items():
+        if not isinstance(grid, list) or not grid or not all(isinstance(row, list) and row for row in grid):
+            raise ValueError(f"page '{page}' must be a list of non-empty rows")
+        for row in grid:
+            for cell in row:
+                if cell is not None and not (isinstance(cell, str) and cell):
+                    raise ValueError(f"page '{page}' has an invalid key {cell!r}")
+    if "lower" not in pages:
+        raise ValueError('missing the "lower" page the keyboard opens on')
+
+    cycle = data.get("page_cycle")
+    if not isinstance(cycle, list):
+        raise ValueError('missing "page_cycle"')
+    for edge in cycle:
+        if not (isinstance(edge, list) and len(edge) == 3 and edge[1] in PAGE_BUTTONS
+                and isinstance(edge[0], str) and isinstance(edge[2], str)):
+            raise ValueError(f'page_cycle entries must be [page, "Y" or "LT", page], got {edge!r}')
+    names = list(dict.fromkeys(list(pages) + [page for edge in cycle for page in (edge[0], edge[2])]))
+    # Every page has to be reachable from every other one, or a switch could get stuck
+    for start in names:
+        seen = {start}
+        stack = [start]
+        while stack:
+            page = stack.pop()
+            for source, _, target in cycle:
+                if source == page and target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        for page in names:
+            if page not in seen:
+                raise ValueError(f"page '{page}' can't be reached from '{start}' along page_cycle")
+
+    wrap = data.get("wrap", False)
+    if isinstance(wrap, dict):
+        wrap = {page: _pack_wrap(wrap.get(page, False), page) for page in names}
     else:
-        print(f"Character '{ch}' not found, skipped.")
+        wrap = {page: _pack_wrap(wrap, page) for page in names}
+
+    index = {}
+    for page, grid in pages.items():
+        for r, row in enumerate(grid):
+            for c, cell in enumerate(row):
+                if cell is None:
+                    continue
+                ch = cell.upper() if page == "upper" and cell.isalpha() else cell
+                index.setdefault(ch, []).append([page, r, c])
+
+    return {
+        "format": LAYOUT_CACHE_FORMAT,
+        "name": name,
+        "title": data.get("title") or name,
+        "pages": {page: pages.get(page, []) for page in names},
+        "page_cycle": cycle,
+        "wrap": wrap,
+        "char_index": index,
+    }
+
+def load_layout_pack(path):
+    """Load a layout pack file, from its compiled cache when the file is unchanged"""
+    path = Path(path)
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()[:16]
+    # A user pack can share its file name with a bundled one, so key the cache by path too
+    prefix = f"{path.stem}-{hashlib.sha256(str(path.resolve()).encode('utf-8')).hexdigest()[:8]}"
+    cache_file = LAYOUT_CACHE_DIR / f"{prefix}-{digest}.json"
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            compiled = json.load(f)
+        if compiled.get("format") == LAYOUT_CACHE_FORMAT:
+            return compiled
+    except (OSError, ValueError):
+        pass
 
-    # After symbol -> check next character
-    if in_symbol and next_ch:
-        if next_ch.isupper() and next_ch.isalpha():
-            switch_to_upper()
-        elif next_ch.islower():
-            switch_to_lower()
+    compiled = compile_layout_pack(json.loads(raw.decode("utf-8")))
+    compiled["hash"] = digest
+    try:
+        LAYOUT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        temp_file = cache_file.with_suffix(".tmp")
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(compiled, f, ensure_ascii=False)
+        os.replace(temp_file, cache_file)
+        # Drop the caches of earlier versions of this file
+        for old in LAYOUT_CACHE_DIR.glob(f"{prefix}-*.json"):
+            if old != cache_file:
+                old.unlink()
+    except OSError as e:
+        print(f"Warning: Could not cache layout pack {path.name}: {e}")
+    return compiled
+
+def load_layout_packs():
+    """Load the bundled layout packs and the user's, which replace bundled ones of the same name"""
+    layout_packs.clear()
+    for folder in (BUNDLED_LAYOUT_DIR, LAYOUT_PACK_DIR):
+        for path in sorted(folder.glob("*.json")):
+            try:
+                pack = load_layout_pack(path)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Skipping layout pack {path}: {e}")
+                continue
+            layout_packs[pack["name"]] = pack
+    return layout_packs
+
+def activate_layout_pack(pack):
+    """Make a compiled layout pack's pages, page cycle and wrap-around the active ones"""
+    global layout_pack, layout_pages, char_index
+    layout_pack = pack
+    layout_pages = pack["pages"]
+    char_index = {ch: [tuple(key) for key in keys] for ch, keys in pack["char_index"].items()}
+    PAGE_CYCLE.clear()
+    PAGE_CYCLE.update({(source, button): target for source, button, target in pack["page_cycle"]})
+    apply_layout_wrap()
+    transliteration_cache.clear()
+
+# Text preparation
+# Replacements for characters the active layouts lack, tried in order; the
+# first one whose characters can all be typed is used. Extended with the
+# "transliterations" config option.
+DEFAULT_TRANSLITERATIONS = {
+    "\u2018": ("'", "´"), "\u2019": ("'", "´"), "\u201a": (",",), "\u201b": ("'", "´"), "'": ("´",),
+    "\u201c": ('"',), "\u201d": ('"',), "\u201e": ('"',), "«": ('"',), "»": ('"',),
+    "\u2013": ("-",), "\u2014": ("-",), "\u2015": ("-",), "\u2212": ("-",),
+    "\u2026": ("...",), "€": ("EUR",), "\t": (" ",), "\u00a0": (" ",),
+    "ä": ("ae",), "ö": ("oe",), "ü": ("ue",), "Ä": ("Ae",), "Ö": ("Oe",), "Ü": ("Ue",), "ß": ("ss",),
+    "æ": ("ae",), "Æ": ("Ae",), "œ": ("oe",), "Œ": ("Oe",), "ø": ("o",), "Ø": ("O",),
+}
+transliterations = dict(DEFAULT_TRANSLITERATIONS)
+transliteration_cache = {}  # char -> replacement for the active language, None if it can't be typed
+
+def set_transliterations(table):
+    """Add or override transliterations, e.g. {"€": "EUR", "’": ["'", "´"]}"""
+    transliterations.clear()
+    transliterations.update(DEFAULT_TRANSLITERATIONS)
+    for ch, replacement in (table or {}).items():
+        transliterations[ch] = (replacement,) if isinstance(replacement, str) else tuple(replacement)
+    transliteration_cache.clear()
+
+def _typeable(text):
+    return all(ch == " " or ch in char_index for ch in text)
+
+def transliterate(ch):
+    """Return what to type for a character: itself, a replacement, or None"""
+    if ch == " " or ch in char_index:
+        return ch
+    if ch in transliteration_cache:
+        return transliteration_cache[ch]
+    import unicodedata
+    candidates = list(transliterations.get(ch, ()))
+    # Fall back to the letter without its accents, e.g. é -> e
+    stripped = "".join(c for c in unicodedata.normalize("NFKD", ch) if not unicodedata.combining(c))
+    if stripped and stripped != ch:
+        candidates.append(stripped)
+    replacement = next((candidate for candidate in candidates if _typeable(candidate)), None)
+    transliteration_cache[ch] = replacement
+    return replacement
+
+def prepare_text(text, newline=" ", dropped=None):
+    """Transliterate text to the active layouts before any input is sent.
+
+    Line breaks become `newline`; characters that can't be typed even after
+    transliteration are removed and counted in `dropped` (a Counter).
+    Returns the prepared text.
+    """
+    if dropped is None:
+        dropped = Counter()
+    out = []
+    for ch in text:
+        if ch == "\n":
+            out.append(newline)
+            continue
+        if ch == "\r":
+            continue
+        replacement = transliterate(ch)
+        if replacement is None:
+            dropped[ch] += 1
+        else:
+            out.append(replacement)
+    return "".join(out)
+
+def describe_dropped(dropped):
+    """Human-readable summary of the characters prepare_text dropped"""
+    total = sum(dropped.values())
+    chars = ", ".join(f"'{ch}'" + (f" x{count}" if count > 1 else "") for ch, count in dropped.most_common())
+    return f"{total} character{'s' if total != 1 else ''} can't be typed in {current_language} and will be skipped: {chars}"
+
+# Planning
+SPACE_KEY = "space"
+
+def action_costs():
+    """Return the time in seconds each action takes at the current speed"""
+    return {
+        "move": MOVE_HOLD + MOVE_SETTLE,
+        "A": BUTTON_HOLD + BUTTON_SETTLE,
+        "space": TRIGGER_HOLD + TRIGGER_SETTLE,
+        "Y": Y_HOLD + Y_SETTLE,
+        "LT": LT_HOLD + LT_SETTLE,
+    }
 
-def reset_state():
-    switch_to_lower()
-    reset_cursor()
+def switch_cost(from_layout, to_layout, costs=None):
+    """Time needed to switch between two layouts"""
+    costs = costs or action_costs()
+    return sum(costs[b] for b in layout_transition(from_layout, to_layout))
+
+def move_cost(layout_name, from_row, from_col, to_row, to_col, costs=None):
+    """Time needed to move the cursor between two cells of a layout"""
+    costs = costs or action_costs()
+    return route_cost(plan_route(layout_name, from_row, from_col, to_row, to_col), costs)
+
+def plan_text(text, start=None):
+    """Plan which key to press for every character of text.
+
+    Runs a shortest-path search over cursor states (layout, row, col), so
+    layout switches and duplicate keys are chosen for the whole text rather
+    than one character at a time. Returns one entry per character: a
+    (layout, row, col) key, SPACE_KEY, or None if the character can't be typed.
+    Planning starts from `start`, or the default engine's cursor.
+    """
+    if start is None:
+        start = engine.position()
+    costs = action_costs()
+    plan = [None] * len(text)
+    frontier = {start: 0.0}
+    layers = []
+
+    for i, ch in enumerate(text):
+        if ch == " ":
+            plan[i] = SPACE_KEY
+            continue
+        entries = char_index.get(ch)
+        if not entries:
+            continue
+        layer = {}
+        for key in entries:
+            if key in layer:
+                continue
+            best = None
+            for state, cost in frontier.items():
+                total = cost + switch_cost(state[0], key[0], costs) + move_cost(key[0], state[1], state[2], key[1], key[2], costs)
+                if best is None or total < best[0]:
+                    best = (total, state)
+            layer[key] = best
+        layers.append((i, layer))
+        frontier = {key: best[0] for key, best in layer.items()}
+
+    # Walk back from the cheapest final state
+    if layers:
+        key = min(frontier, key=frontier.get)
+        for i, layer in reversed(layers):
+            plan[i] = key
+            key = layer[key][1]
+    return plan
+
+def plan_durations(plan, start, costs=None):
+    """Estimated seconds each planned character takes, including the pause after it"""
+    costs = costs or action_costs()
+    state = start
+    durations = []
+    for step in plan:
+        seconds = POLL_INTERVAL
+        if step == SPACE_KEY:
+            seconds += costs["space"]
+        elif step is not None:
+            seconds += switch_cost(state[0], step[0], costs) + move_cost(step[0], state[1], state[2], step[1], step[2], costs) + costs["A"]
+            state = step
+        durations.append(seconds)
+    return durations
+
+# Plan cache
+# Plans of texts typed before, kept on disk so repeated texts (greetings,
+# dream addresses, passwords) start typing without being planned again.
+PLAN_CACHE_SIZE = 4 * 1024 * 1024  # Bytes kept before the least recently used plans are removed
+PLAN_CACHE_MAGIC = b"ACP1"
+PLAN_NONE = 255  # Page code of characters that can't be typed
+PLAN_SPACE = 254  # Page code of spaces
+
+# Reuse cached plans ("plan_cache" config option)
+plan_caching = True
+
+def set_plan_caching(enabled):
+    """Enable or disable the on-disk plan cache"""
+    global plan_caching
+    plan_caching = bool(enabled)
+
+def planning_settings():
+    """Everything besides the text and start that a plan depends on"""
+    costs = action_costs()
+    return (current_language, layout_pack["hash"], tuple(sorted(costs.items())), POLL_INTERVAL,
+            MOVE_HOLD, MOVE_SETTLE, hold_repeat, REPEAT_DELAY, REPEAT_INTERVAL, diagonal_moves,
+            tuple(sorted(LAYOUT_WRAP.items())))
+
+class PlanCache:
+    """Least recently used cache of plans and their durations, one file per plan.
+
+    Files are named after a hash of the text, the start state and
+    planning_settings(), so a change of language, layout pack, timing or
+    navigation option misses instead of returning a stale plan. A plan is
+    stored as 3 bytes per character (page, row, column) followed by the
+    estimated durations as 32-bit floats. Reading a plan touches its file;
+    once the folder holds more than max_bytes the oldest files are removed.
+    """
+
+    def __init__(self, folder, max_bytes=PLAN_CACHE_SIZE):
+        self.folder = Path(folder)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    def path(self, text, start):
+        key = repr((text, start, planning_settings())).encode("utf-8")
+        return self.folder / (hashlib.sha256(key).hexdigest()[:32] + ".plan")
+
+    def get(self, text, start):
+        """Return the cached (plan, durations) for text from start, or None"""
+        path = self.path(text, start)
+        try:
+            with self.lock:
+                data = path.read_bytes()
+                os.utime(path)
+        except OSError:
+            return None
+        count = len(text)
+        if data[:4] != PLAN_CACHE_MAGIC or len(data) != 4 + count * 7:
+            return None
+        pages = list(layout_pages)
+        codes = data[4:4 + count * 3]
+        plan = []
+        for i in range(0, len(codes), 3):
+            page = codes[i]
+            if page == PLAN_NONE:
+                plan.append(None)
+            elif page == PLAN_SPACE:
+                plan.append(SPACE_KEY)
+            else:
+                plan.append((pages[page], codes[i + 1], codes[i + 2]))
+        durations = array("f")
+        durations.frombytes(data[4 + count * 3:])
+        return plan, durations.tolist()
+
+    def put(self, text, start, plan, durations):
+        """Store a plan, then remove the least recently used ones over the size limit"""
+        pages = {name: code for code, name in enumerate(layout_pages)}
+        codes = array("B")
+        for step in plan:
+            if step is None:
+                codes.extend((PLAN_NONE, 0, 0))
+            elif step == SPACE_KEY:
+                codes.extend((PLAN_SPACE, 0, 0))
+            elif step[1] < 256 and step[2] < 256:
+                codes.extend((pages[step[0]], step[1], step[2]))
+            else:
+                return
+        data = PLAN_CACHE_MAGIC + codes.tobytes() + array("f", durations).tobytes()
+        if len(data) > self.max_bytes // 4:
+            return
+        path = self.path(text, start)
+        with self.lock:
+            try:
+                self.folder.mkdir(parents=True, exist_ok=True)
+                temp_path = path.with_suffix(".tmp")
+                with open(temp_path, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+                self.evict()
+            except OSError as e:
+                print(f"Warning: Could not cache plan: {e}")
+
+    def evict(self):
+        entries = [(entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                   for entry in os.scandir(self.folder) if entry.name.endswith(".plan")]
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        """Remove every cached plan"""
+        with self.lock:
+            for path in self.folder.glob("*.plan"):
+                path.unlink()
+
+def cached_plan(text, start):
+    """Plan text from start and estimate its durations, reusing plan_cache when enabled"""
+    if plan_caching:
+        hit = plan_cache.get(text, start)
+        if hit is not None:
+            return hit
+    plan = plan_text(text, start=start)
+    durations = plan_durations(plan, start)
+    if plan_caching:
+        plan_cache.put(text, start, plan, durations)
+    return plan, durations
+
+# Tracing
+TRACE_SIZE = 65536  # Inputs and reports kept by an ActionTracer
+
+class ActionTracer:
+    """Ring buffer of the inputs and reports a pad sent, for profiling runs.
+
+    Every entry is one tuple written into a preallocated list, overwriting
+    the oldest once the buffer is full, so tracing is cheap enough to leave
+    on. Inputs are (start, channel, target, hold, settle, actual hold, actual
+    settle) with target the (character, planned key) being typed; reports are
+    (time, "report"). export() writes the buffer as a Chrome trace (open it
+    in chrome://tracing or Perfetto) and as CSV.
+    """
+
+    CSV_FIELDS = ("start_ms", "action", "char", "layout", "row", "col",
+                  "hold_ms", "actual_hold_ms", "settle_ms", "actual_settle_ms")
+
+    def __init__(self, size=TRACE_SIZE):
+        self.entries = [None] * size
+        self.index = 0
+        self.count = 0
+
+    def record(self, *entry):
+        self.entries[self.index] = entry
+        self.index = (self.index + 1) % len(self.entries)
+        self.count += 1
+
+    def clear(self):
+        self.index = 0
+        self.count = 0
+
+    def events(self):
+        """Recorded entries, oldest first"""
+        if self.count < len(self.entries):
+            return self.entries[:self.index]
+        return self.entries[self.index:] + self.entries[:self.index]
+
+    def rows(self):
+        """Recorded inputs as CSV_FIELDS tuples, times in ms from the first entry"""
+        events = self.events()
+        origin = events[0][0] if events else 0.0
+        for entry in events:
+            if entry[1] == "report":
+                continue
+            start, action, target, hold, settle, actual_hold, actual_settle = entry
+            ch, step = target if target is not None else ("", None)
+            layout, row, col = step if isinstance(step, tuple) else (step or "", "", "")
+            yield (round((start - origin) * 1000, 3), action, ch, layout, row, col,
+                   round(hold * 1000, 3), round(actual_hold * 1000, 3),
+                   round(settle * 1000, 3), round(actual_settle * 1000, 3))
+
+    def export(self, path, pad_index=0):
+        """Write path.json (Chrome trace events) and path.csv; returns both paths"""
+        import csv
+        path = Path(path)
+        json_path = path.with_suffix(".json")
+        csv_path = path.with_suffix(".csv")
+        events = self.events()
+        origin = events[0][0] if events else 0.0
+        trace = []
+        for entry in events:
+            ts = (entry[0] - origin) * 1e6
+            if entry[1] == "report":
+                trace.append({"name": "report", "cat": "report", "ph": "i", "s": "t",
+                              "ts": ts, "pid": 1, "tid": pad_index})
+                continue
+            start, action, target, hold, settle, actual_hold, actual_settle = entry
+            args = {"hold_ms": hold * 1000, "actual_hold_ms": actual_hold * 1000,
+                    "settle_ms": settle * 1000, "actual_settle_ms": actual_settle * 1000}
+            if target is not None:
+                args["char"], args["key"] = target[0], target[1]
+            trace.append({"name": action, "cat": "input", "ph": "X", "ts": ts,
+                          "dur": (actual_hold + actual_settle) * 1e6, "pid": 1, "tid": pad_index, "args": args})
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        with open(csv_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.CSV_FIELDS)
+            writer.writerows(self.rows())
+        return json_path, csv_path
+
+# Record every input of the GUI's runs and save the traces to TRACE_DIR ("trace" config option)
+trace_runs = False
+
+def set_tracing(enabled):
+    """Enable or disable tracing on the default engine"""
+    global trace_runs
+    trace_runs = bool(enabled)
+    if not trace_runs:
+        engine.tracer = None
+    elif engine.tracer is None:
+        engine.tracer = ActionTracer()
+
+def export_trace(pad, name=None):
+    """Save a pad's trace to TRACE_DIR, returning the (json, csv) paths or None"""
+    if pad.tracer is None or not pad.tracer.count:
+        return None
+    try:
+        TRACE_DIR.mkdir(parents=True, exist_ok=True)
+        return pad.tracer.export(TRACE_DIR / (name or time.strftime("trace-%Y%m%d-%H%M%S")))
+    except Exception as e:
+        print(f"Error saving trace: {e}")
+        return None
+
+# Pad engine
+class TypingProgress:
+    """Progress of a pad's typing run, published for other threads to sample.
+
+    The typing thread only assigns a couple of attributes per character, with
+    no locks or cross-thread calls; readers such as the GUI call snapshot() at
+    their own refresh rate.
+    """
+
+    def __init__(self, counts, clock=time.perf_counter):
+        self.counts = counts
+        self.clock = clock
+        self.start(None)
+
+    def start(self, total, estimate=None):
+        """Begin a run of `total` characters (None if unknown) planned to take `estimate` seconds"""
+        self.total = total
+        self.typed = 0
+        self.estimate = estimate
+        self.remaining = estimate
+        self.started = self.clock()
+        self.finished = None
+        self.actions_at_start = self.actions()
+
+    def finish(self):
+        self.finished = self.clock()
+
+    def actions(self):
+        """Stick moves and button presses sent so far"""
+        counts = self.counts
+        return counts["moves"] + counts["A"] + counts["space"] + counts["Y"] + counts["LT"]
+
+    def snapshot(self):
+        """Typed and total characters, rates per second and the estimated seconds left"""
+        elapsed = (self.finished or self.clock()) - self.started
+        typed, total, remaining = self.typed, self.total, self.remaining
+        chars_per_sec = typed / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if remaining is not None:
+            # Scale the planned time left by how the run has kept to the plan so far
+            done = self.estimate - remaining
+            eta = max(0.0, remaining) * (elapsed / done if done > 0.001 else 1.0)
+        elif total is not None and chars_per_sec > 0:
+            eta = (total - typed) / chars_per_sec
+        return {
+            "typed": typed,
+            "total": total,
+            "elapsed": elapsed,
+            "chars_per_sec": chars_per_sec,
+            "actions_per_sec": (self.actions() - self.actions_at_start) / elapsed if elapsed > 0 else 0.0,
+            "eta": eta,
+        }
+
+def format_progress(snapshot):
+    """One-line progress text, e.g. 12/80 - 3.1 chars/s - 9.4 actions/s - 0:22 left"""
+    parts = [f"{snapshot['typed']}/{snapshot['total']}" if snapshot["total"] is not None else str(snapshot["typed"])]
+    parts.append(f"{snapshot['chars_per_sec']:.1f} chars/s")
+    parts.append(f"{snapshot['actions_per_sec']:.1f} actions/s")
+    if snapshot["eta"] is not None:
+        minutes, seconds = divmod(int(snapshot["eta"] + 0.5), 60)
+        parts.append(f"{minutes}:{seconds:02d} left")
+    return " - ".join(parts)
+
+class PadEngine:
+    """Drives one gamepad and tracks the keyboard state it leaves the game in.
+
+    Every virtual controller gets its own engine, so several pads can type at
+    the same time from different threads. Language, timings and navigation
+    options are shared by all of them. The module-level `engine` is the pad
+    the GUI and the single-pad commands use.
+    """
+
+    def __init__(self, backend=None):
+        self.gamepad = None
+        self.gamepad_connected = False
+        self.scheduler = DeadlineScheduler()
+        # Inputs sent since the counters were last cleared: stick moves, button
+        # presses, layout switches and gamepad reports
+        self.action_counts = Counter()
+        self.progress = TypingProgress(self.action_counts, lambda: self.scheduler.clock())
+        self.pending_release = None  # (channel, release function) not sent yet
+        self.released_at = {}  # channel -> (scheduler deadline at release, settle it needs)
+        self.tracer = ActionTracer() if trace_runs else None  # Records every input, if tracing
+        self.target = None  # (character, planned key) being typed, for the tracer
+        self.layout_name = "lower"
+        self.cursor_row = 0
+        self.cursor_col = 0
+        # Whether the tracked layout and cursor are known to match the game,
+        # i.e. the keyboard has been homed since the backend was set
+        self.state_known = False
+        # Where the last interrupted run stopped: {"run": text or list of
+        # messages, "typed": characters typed}, or None. See resume().
+        self.checkpoint = None
+        if backend is not None:
+            self.set_backend(backend)
+
+    # Gamepad connection
+    def set_backend(self, backend):
+        """Drive a different gamepad backend, e.g. a SimulatedKeyboard"""
+        self.gamepad = backend
+        self.gamepad_connected = False
+        self.state_known = False
+        self.pending_release = None
+        self.released_at.clear()
+        if backend is not None and backend.clock is not None:
+            self.scheduler.use_clock(backend.clock, backend.sleep, spin=False)
+        else:
+            self.scheduler.use_clock(time.perf_counter, time.sleep)
+
+    def init_gamepad(self, announce=True):
+        """Initialize and register the virtual gamepad with the system"""
+        try:
+            if self.gamepad is None:
+                self.set_backend(VGamepadBackend())
+
+            if not self.gamepad_connected:
+                # vgamepad automatically connects when created
+                # Send an initial update to register it with the system
+                # This makes it visible to Dolphin and other applications
+                self.gamepad.reset()
+                self.gamepad.update()
+                self.gamepad_connected = True
+                if announce and self.gamepad.connect_message:
+                    print(self.gamepad.connect_message)
+            return True
+        except Exception as e:
+            error_msg = f"ERROR registering gamepad:\n{str(e)}\n\nFull traceback:\n{traceback.format_exc()}"
+            print(error_msg)
+            self.gamepad_connected = False
+            return False
+
+    def disconnect_gamepad(self):
+        """Disconnect the virtual gamepad"""
+        try:
+            if self.gamepad is not None and self.gamepad_connected:
+                # Reset gamepad state
+                self.gamepad.reset()
+                self.gamepad.update()
+                # Note: vgamepad doesn't have explicit disconnect, it disconnects on cleanup
+                self.gamepad_connected = False
+                print("Gamepad disconnected.")
+        except Exception as e:
+            print(f"Error disconnecting gamepad: {e}")
+
+    # Control functions
+    def send_report(self):
+        """Send the pending gamepad report"""
+        self.action_counts["reports"] += 1
+        self.gamepad.update()
+        if self.tracer is not None:
+            self.tracer.record(self.scheduler.clock(), "report")
+
+    def flush_release(self):
+        """Send a held-back release on its own and wait out its settle"""
+        if self.pending_release is None:
+            return
+        channel, release = self.pending_release
+        self.pending_release = None
+        release()
+        self.send_report()
+        settle = self.released_at[channel][1]
+        self.released_at[channel] = (self.scheduler.clock(), settle)
+        self.scheduler.wait(settle)
+
+    def _pulse(self, channel, press, release, hold, settle, overlap=True):
+        """Press an input on one channel, hold it, then release it.
+
+        A pending release on another channel is merged into this press report;
+        one on the same channel is flushed first. The channel's own settle
+        since its last release is always respected. Page changes pass
+        overlap=False and always wait out their settle, since the keyboard
+        ignores input while it redraws.
+        """
+        scheduler = self.scheduler
+        merged = None
+        if self.pending_release is not None:
+            if self.pending_release[0] == channel:
+                self.flush_release()
+            else:
+                merged = self.pending_release[0]
+                self.pending_release[1]()
+                self.pending_release = None
+                self.action_counts["reports_saved"] += 1
+        if channel in self.released_at:
+            release_time, needed = self.released_at[channel]
+            remaining = release_time + needed - scheduler.clock()
+            if remaining > 0:
+                scheduler.wait(remaining)
+
+        press()
+        self.send_report()
+        if merged is not None:
+            # The merged release only reached the game with this report
+            self.released_at[merged] = (scheduler.clock(), self.released_at[merged][1])
+        tracer = self.tracer
+        if tracer is not None:
+            pressed = scheduler.clock()
+        scheduler.wait(hold)
+        self.released_at[channel] = (scheduler.deadline, settle)
+        if coalesce_reports and overlap:
+            self.pending_release = (channel, release)
+            if tracer is not None:
+                # The settle overlaps whatever is pressed next
+                tracer.record(pressed, channel, self.target, hold, settle, scheduler.clock() - pressed, 0.0)
+            return
+        release()
+        self.send_report()
+        released = scheduler.clock()
+        self.released_at[channel] = (released, settle)
+        scheduler.wait(settle)
+        if tracer is not None:
+            tracer.record(pressed, channel, self.target, hold, settle, released - pressed, scheduler.clock() - released)
+
+    def _center_stick(self):
+        self.gamepad.left_joystick(0, 0)
+
+    def _stick(self, x_value, y_value, hold):
+        self.action_counts["moves"] += 1
+        self._pulse("stick", lambda: self.gamepad.left_joystick(x_value, y_value), self._center_stick,
+                    hold, MOVE_SETTLE)
+
+    def move_up(self):
+        self._stick(0, 32767, MOVE_HOLD)
+
+    def move_down(self):
+        self._stick(0, -32768, MOVE_HOLD)
+
+    def move_left(self):
+        self._stick(-32768, 0, MOVE_HOLD)
+
+    def move_right(self):
+        self._stick(32767, 0, MOVE_HOLD)
+
+    def move_diagonal(self, d_row, d_col):
+        """Move one row and one column at once by deflecting the stick on both axes"""
+        self._stick(32767 if d_col > 0 else -32768, -32768 if d_row > 0 else 32767, MOVE_HOLD)
+
+    def hold_move(self, d_row, d_col, steps):
+        """Hold the stick in one direction and release once auto-repeat has moved `steps` cells"""
+        self._stick(
+            32767 if d_col > 0 else -32768 if d_col < 0 else 0,
+            -32768 if d_row > 0 else 32767 if d_row < 0 else 0,
+            hold_duration(steps)
+        )
+
+    def press_A(self):
+        self.action_counts["A"] += 1
+        self._pulse("A", lambda: self.gamepad.press_button("A"), lambda: self.gamepad.release_button("A"),
+                    BUTTON_HOLD, BUTTON_SETTLE)
+
+    def press_space(self):
+        self.action_counts["space"] += 1
+        self._pulse("RT", lambda: self.gamepad.right_trigger(value=255), lambda: self.gamepad.right_trigger(value=0),
+                    TRIGGER_HOLD, TRIGGER_SETTLE)
+
+    def press_Y(self):
+        self.action_counts["Y"] += 1
+        self._pulse("Y", lambda: self.gamepad.press_button("Y"), lambda: self.gamepad.release_button("Y"),
+                    Y_HOLD, Y_SETTLE, overlap=False)
+
+    def press_LT(self):
+        self.action_counts["LT"] += 1
+        self._pulse("LT", lambda: self.gamepad.left_trigger(value=255), lambda: self.gamepad.left_trigger(value=0),
+                    LT_HOLD, LT_SETTLE, overlap=False)
+
+    def pause_between_chars(self):
+        """Wait POLL_INTERVAL between characters, unless a held-back release overlaps it"""
+        if self.pending_release is None:
+            self.scheduler.wait(POLL_INTERVAL, catch_up=True)
+
+    # Cursor control
+    def reset_cursor(self):
+        """Move the cursor to the first key of the page, returning False if it can't be homed.
+
+        A wrapping page has no edges to push the cursor against, so there it
+        can only walk back from a tracked position known to match the game.
+        """
+        if layout_wraps(self.layout_name):
+            if not self.state_known:
+                return False
+            self.move_to(0, 0)
+            return True
+        grid = get_layout(self.layout_name)
+        if use_hold(len(grid)) and use_hold(max(len(row) for row in grid)):
+            # Hold against the top and left edges long enough to cross the whole grid
+            self.hold_move(-1, 0, len(grid))
+            self.hold_move(0, -1, max(len(row) for row in grid))
+        else:
+            # Push against the top and left edges for as many moves as the grid is tall and wide
+            rows = len(grid) - 1
+            cols = max(len(row) for row in grid) - 1
+            for i in range(max(rows, cols)):
+                if i < rows:
+                    self.move_up()
+                if i < cols:
+                    self.move_left()
+        self.cursor_row = 0
+        self.cursor_col = 0
+        return True
+
+    def move_to(self, row, col):
+        layout_name = self.layout_name
+        for d_row, d_col, steps in plan_route(layout_name, self.cursor_row, self.cursor_col, row, col):
+            if use_hold(steps):
+                self.hold_move(d_row, d_col, steps)
+                for _ in range(steps):
+                    self.cursor_row, self.cursor_col = _step_cursor(layout_name, self.cursor_row, self.cursor_col, d_row, d_col)
+                continue
+            for _ in range(steps):
+                if d_row and d_col:
+                    self.move_diagonal(d_row, d_col)
+                else:
+                    getattr(self, MOVES[(d_row, d_col)])()
+                self.cursor_row, self.cursor_col = _step_cursor(layout_name, self.cursor_row, self.cursor_col, d_row, d_col)
+
+    # Keyboard switching
+    def switch_to_layout(self, name):
+        """Switch to a layout by name ("upper", "lower", "symbols" or "emoji")"""
+        buttons = layout_transition(self.layout_name, name)
+        if buttons:
+            self.action_counts["layout_switches"] += 1
+        for button in buttons:
+            if button == "Y":
+                self.press_Y()
+            else:
+                self.press_LT()
+        self.layout_name = name
+
+    def switch_to_lower(self):
+        self.switch_to_layout("lower")
+
+    # Type characters
+    def type_planned(self, ch, step):
+        """Type one character using the key chosen by plan_text"""
+        self.target = (ch, step)
+        if step == SPACE_KEY:
+            self.press_space()
+        elif step is None:
+            print(f"Character '{ch}' not found, skipped.")
+        else:
+            layout_name, r, c = step
+            self.switch_to_layout(layout_name)
+            self.move_to(r, c)
+            self.press_A()
+
+    def reset_state(self):
+        """Home the keyboard on the first key of the lowercase page, if it can be homed"""
+        if not self.state_known and layout_wraps("lower"):
+            # Nothing to push the cursor against: send no input and leave the state unknown
+            return
+        self.switch_to_lower()
+        self.state_known = self.reset_cursor()
+
+    def ensure_state(self):
+        """Home the keyboard, unless the tracked layout and cursor are known to match the game.
+
+        Runs leave the state known, so back-to-back runs skip homing; it is
+        only needed on a new backend, after an error or after forget_state().
+        Raises RuntimeError if the keyboard wraps and so can't be homed; then
+        the user has to put the cursor on the first key and assume_state().
+        """
+        if not self.state_known:
+            self.reset_state()
+        if not self.state_known:
+            raise RuntimeError("the keyboard wraps around its edges, so the cursor can't be homed - put it on "
+                               "the first key of the lowercase page, then click Reset or pass --assume-home")
+
+    def forget_state(self):
+        """Mark the tracked state as uncertain, so the next run homes the keyboard first"""
+        self.state_known = False
+
+    def assume_state(self, layout_name="lower", row=0, col=0):
+        """Set the tracked layout and cursor without sending any input"""
+        self.state_known = True
+        self.layout_name = layout_name
+        self.cursor_row = row
+        self.cursor_col = col
+
+    def position(self):
+        """The tracked (layout, row, col) of the cursor"""
+        return (self.layout_name, self.cursor_row, self.cursor_col)
+
+    def start_timeline(self):
+        """Start a new scheduler timeline, quantized to frames in frame-sync mode"""
+        self.scheduler.frame_period = 1.0 / FRAME_RATE if frame_sync else None
+        self.scheduler.start()
+
+    def type_text(self, text_to_type, should_stop=None, on_char=None, cache=True):
+        """Plan text and type it with this pad.
+
+        should_stop() is checked before every character and on_char(index) is
+        called right before it is typed; `progress` follows the run. The plan
+        comes from the plan cache when the text was typed before, unless cache
+        is False. Returns how many characters were typed.
+        """
+        start = self.position()
+        if cache:
+            plan, durations = cached_plan(text_to_type, start)
+        else:
+            plan = plan_text(text_to_type, start=start)
+            durations = plan_durations(plan, start)
+        progress = self.progress
+        self.start_timeline()
+        progress.start(len(text_to_type), sum(durations))
+        typed = 0
+        try:
+            for index, (ch, step) in enumerate(zip(text_to_type, plan)):
+                if should_stop is not None and should_stop():
+                    break
+                if on_char is not None:
+                    on_char(index)
+                self.type_planned(ch, step)
+                self.pause_between_chars()
+                typed = index + 1
+                progress.typed = typed
+                progress.remaining -= durations[index]
+        except BaseException:
+            # An input may have been cut off, so the tracked cursor can't be trusted
+            self.state_known = False
+            raise
+        finally:
+            self.flush_release()
+            progress.finish()
+            self.save_checkpoint(text_to_type, typed, len(text_to_type))
+        return typed
+
+    def type_stream(self, chunks, should_stop=None, on_char=None, restart=None, after_chunk=None, total=None):
+        """Type text from an iterable of chunks, planning ahead while typing.
+
+        A planner thread plans each chunk from where the previous one leaves
+        the cursor (or from the `restart` state, if after_chunk(index, chunk)
+        puts the keyboard there) and stays at most STREAM_READ_AHEAD chunks
+        ahead, so memory stays flat however long the input is. should_stop and
+        on_char work as for type_text, with on_char getting the index in the
+        whole stream, and `total` is the stream length for progress if known.
+        Returns how many characters were typed.
+        """
+        import queue
+        planned = queue.Queue(maxsize=STREAM_READ_AHEAD)
+        stopped = threading.Event()
+
+        def put(item):
+            while not stopped.is_set():
+                try:
+                    planned.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def planner(state):
+            try:
+                for chunk in chunks:
+                    plan = plan_text(chunk, start=state)
+                    state = restart or plan_end_state(plan, state)
+                    if not put((chunk, plan)):
+                        return
+                put(None)
+            except Exception as e:
+                put(e)
+
+        threading.Thread(target=planner, args=(self.position(),), daemon=True).start()
+        self.start_timeline()
+        self.progress.start(total)
+        typed = 0
+        chunk_count = 0
+        try:
+            while True:
+                item = planned.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                chunk, plan = item
+                for ch, step in zip(chunk, plan):
+                    if should_stop is not None and should_stop():
+                        return typed
+                    if on_char is not None:
+                        on_char(typed)
+                    self.type_planned(ch, step)
+                    self.pause_between_chars()
+                    typed += 1
+                    self.progress.typed = typed
+                if after_chunk is not None:
+                    after_chunk(chunk_count, chunk)
+                chunk_count += 1
+        except BaseException:
+            self.state_known = False
+            raise
+        finally:
+            stopped.set()
+            self.flush_release()
+            self.progress.finish()
+        return typed
+
+    def type_messages(self, messages, should_stop=None, on_char=None, on_message=None, total=None):
+        """Type messages one after another, sending each with the confirm sequence.
+
+        After a message is typed, chunk_confirm sends it and the cursor is homed
+        on the chunk_layout page the next message starts on, so the next
+        message is planned while the current one is typed.
+        on_message(index, message, seconds) reports each sent message and
+        `total` is the number of characters in all messages, if known. Returns how many characters were typed.
+        A message only counts as sent once its confirm sequence has finished.
+        """
+        restart = (chunk_layout, 0, 0)
+        last = [self.scheduler.clock()]
+        sent = [0]
+
+        def send_message(index, message):
+            self.flush_release()
+            self.run_sequence(chunk_confirm)
+            self.layout_name = chunk_layout
+            self.reset_cursor()
+            self.flush_release()
+            sent[0] = index + 1
+            now = self.scheduler.clock()
+            if on_message is not None:
+                on_message(index, message, now - last[0])
+            last[0] = now
+
+        self.progress.typed = 0
+        try:
+            self.type_stream(messages, should_stop, on_char, restart=restart, after_chunk=send_message, total=total)
+        finally:
+            # Read the live count, which is also right when typing failed part way
+            typed = self.progress.typed
+            # Only a list of messages can be gone through again
+            if isinstance(messages, list):
+                self.save_checkpoint(messages, typed, sum(len(message) for message in messages), sent[0])
+        return typed
+
+    def save_checkpoint(self, run, typed, total, sent=None):
+        """Remember how far a run got if it was interrupted, or forget the last one if it completed.
+
+        For a list of messages, `sent` is how many of them were sent; a message
+        can be fully typed but not sent yet.
+        """
+        if typed >= total and (sent is None or sent >= len(run)):
+            self.checkpoint = None
+        elif sent is None:
+            self.checkpoint = {"run": run, "typed": typed}
+        else:
+            self.checkpoint = {"run": run, "typed": typed, "sent": sent}
+
+    def resume(self, should_stop=None, on_char=None, on_message=None):
+        """Continue the interrupted run in `checkpoint` after its last typed character.
+
+        The keyboard is homed first only if the tracked cursor can't be
+        trusted (the run ended in an error); otherwise typing picks up from
+        where the cursor was left. A partly typed message is finished and sent
+        before the remaining ones, and so is one that was typed but not sent.
+        Returns how many characters of the whole run have been typed.
+        """
+        run = self.checkpoint["run"]
+        done = self.checkpoint["typed"]
+        total = len(run) if isinstance(run, str) else sum(len(message) for message in run)
+        self.ensure_state()
+        sent = [self.checkpoint.get("sent")]
+        self.progress.typed = 0
+        try:
+            if isinstance(run, str):
+                self.type_text(run[done:], should_stop, on_char)
+            else:
+                # Skip the messages already sent, then finish the one that was cut off
+                first = sent[0]
+                skipped = sum(len(message) for message in run[:first])
+                remaining = [run[first][done - skipped:]] + run[first + 1:]
+
+                def report(index, message, seconds):
+                    sent[0] = first + index + 1
+                    if on_message is not None:
+                        on_message(first + index, run[first + index], seconds)
+
+                self.type_messages(remaining, should_stop, on_char, report, total=total - done)
+        finally:
+            # Read the live count, which is also right when typing failed part way
+            typed = done + self.progress.typed
+            self.save_checkpoint(run, typed, total, sent[0])
+        return typed
+
+    def run_sequence(self, steps):
+        """Press a sequence of inputs, e.g. ("START", 1.0): button names, or seconds to wait"""
+        for step in steps:
+            if isinstance(step, (int, float)):
+                self.scheduler.wait(step)
+            elif step == "LT":
+                self.press_LT()
+            elif step == "RT":
+                self.press_space()
+            else:
+                self.action_counts[step] += 1
+                self._pulse(step, lambda: self.gamepad.press_button(step), lambda: self.gamepad.release_button(step),
+                            BUTTON_HOLD, BUTTON_SETTLE, overlap=False)
+
+# The pad used by the GUI and the single-pad commands
+engine = PadEngine()
+
+# Keyboard simulator
+class SimulatedKeyboard(GamepadBackend):
+    """In-process model of the Animal Crossing on-screen keyboard.
+
+    Takes gamepad reports like a real backend and applies them to a cursor on
+    the layout pack's pages: the stick moves it (with auto-repeat while held), A
+    types the key under the cursor, the right trigger types a space, Y/LT
+    change page along PAGE_CYCLE and START sends the message typed so far
+    (collected in `sent`). Inputs held or spaced too briefly for the game are
+    dropped and recorded in `errors`. Runs on a virtual clock by
+    default, so a simulated run takes no real time.
+    """
+
+    connect_message = None
+
+    # Minimum (hold, settle) per input in seconds. For the stick and buttons
+    # the settle is the gap needed before the same input can be pressed again;
+    # after a page change the whole keyboard ignores input while it redraws.
+    MIN_TIMINGS = {
+        "stick": (0.034, 0.017),
+        "A": (0.017, 0.017),
+        "RT": (0.034, 0.017),
+        "Y": (0.017, 0.1),
+        "LT": (0.017, 0.1),
+    }
+    INPUTS = ("A", "B", "X", "Y", "START", "LT", "RT")
+    # Seconds the keyboard takes to reopen after START sends a message
+    REOPEN_TIME = 0.5
+
+    def __init__(self, layouts=None, wrap=None, min_timings=None,
+                 repeat_delay=None, repeat_interval=None, virtual_time=True):
+        self.layouts = layouts or dict(layout_pages)
+        self.wrap = dict(wrap or LAYOUT_WRAP)
+        self.min_timings = dict(self.MIN_TIMINGS)
+        self.min_timings.update(min_timings or {})
+        self.repeat_delay = REPEAT_DELAY if repeat_delay is None else repeat_delay
+        self.repeat_interval = REPEAT_INTERVAL if repeat_interval is None else repeat_interval
+        if virtual_time:
+            self.now = 0.0
+            self.clock = self._virtual_clock
+            self.sleep = self._virtual_sleep
+
+        self.page = "lower"
+        self.row = 0
+        self.col = 0
+        self.typed = []
+        self.sent = []
+        self._message_start = 0
+        self.errors = []
+        self.reports = 0
+        self._pending = self._neutral_report()
+        self._sent = self._neutral_report()
+        self._pressed_at = {}
+        self._released_at = {}
+        self._stick_moves = 0
+        self._busy_until = float("-inf")
+
+    def _virtual_clock(self):
+        return self.now
+
+    def _virtual_sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+    def _neutral_report(self):
+        report = dict.fromkeys(self.INPUTS, False)
+        report["stick"] = (0, 0)
+        return report
+
+    def _now(self):
+        return self.clock() if self.clock is not None else time.perf_counter()
+
+    def received(self):
+        """The text the keyboard has received so far"""
+        return "".join(self.typed)
+
+    # Report setters
+    def left_joystick(self, x_value, y_value):
+        d_col = 1 if x_value > 16384 else -1 if x_value < -16384 else 0
+        d_row = -1 if y_value > 16384 else 1 if y_value < -16384 else 0
+        self._pending["stick"] = (d_row, d_col)
+
+    def press_button(self, button):
+        self._pending[button] = True
+
+    def release_button(self, button):
+        self._pending[button] = False
+
+    def left_trigger(self, value):
+        self._pending["LT"] = value > 127
+
+    def right_trigger(self, value):
+        self._pending["RT"] = value > 127
+
+    def reset(self):
+        self._pending = self._neutral_report()
+
+    def update(self):
+        now = self._now()
+        self.reports += 1
+        self._advance_stick(now)
+        old, new = self._sent, dict(self._pending)
+
+        # Releases first, so a press sent in the same report sees their effect
+        if old["stick"] != (0, 0) and new["stick"] != old["stick"]:
+            self._release("stick", now)
+        for name in self.INPUTS:
+            if old[name] and not new[name]:
+                self._release(name, now)
+        for name in self.INPUTS:
+            if new[name] and not old[name]:
+                self._press(name, now)
+        if new["stick"] != (0, 0) and new["stick"] != old["stick"]:
+            self._press("stick", now)
+            self._stick_moves = 0
+        self._sent = new
+
+    # Game model
+    def _timing(self, name):
+        return self.min_timings.get(name, self.min_timings["A"])
+
+    def _press(self, name, now):
+        settle = self._timing(name)[1]
+        if now < self._busy_until:
+            self.errors.append((now, name, "pressed while the page was changing"))
+        elif now - self._released_at.get(name, float("-inf")) < settle:
+            self.errors.append((now, name, "pressed again too soon"))
+        else:
+            self._pressed_at[name] = now
+            return
+        self._pressed_at[name] = None
+
+    def _release(self, name, now):
+        pressed_at = self._pressed_at.pop(name, None)
+        self._released_at[name] = now
+        if pressed_at is None:
+            return
+        if name == "stick":
+            if self._stick_moves == 0:
+                self.errors.append((now, name, "released too early"))
+            return
+        if now - pressed_at < self._timing(name)[0]:
+            self.errors.append((now, name, "released too early"))
+            return
+        self._fire(name, now)
+
+    def _advance_stick(self, now):
+        """Apply the moves a held stick has made up to now, including auto-repeat"""
+        pressed_at = self._pressed_at.get("stick")
+        if pressed_at is None:
+            return
+        held = now - pressed_at
+        if held < self._timing("stick")[0]:
+            return
+        if held < self.repeat_delay:
+            due = 1
+        else:
+            due = 2 + int((held - self.repeat_delay) / self.repeat_interval)
+        d_row, d_col = self._sent["stick"]
+        while self._stick_moves < due:
+            self._move(d_row, d_col)
+            self._stick_moves += 1
+
+    def _move(self, d_row, d_col):
+        grid = self.layouts.get(self.page)
+        if not grid:
+            return
+        wrap_rows, wrap_cols = self.wrap.get(self.page, (False, False))
+        row = self.row + d_row
+        if not 0 <= row < len(grid):
+            row = row % len(grid) if wrap_rows else self.row
+        col = self.col + d_col
+        if d_col and not 0 <= col < len(grid[row]):
+            if wrap_cols and 0 <= self.col < len(grid[row]):
+                col = len(grid[row]) - 1 if col < 0 else 0
+            else:
+                col = self.col
+        self.row, self.col = row, col
+
+    def _fire(self, name, now):
+        if name == "A":
+            grid = self.layouts.get(self.page)
+            row = grid[self.row] if grid else []
+            cell = row[self.col] if self.col < len(row) else None
+            if cell is None:
+                self.errors.append((now, name, f"no key at {self.page} ({self.row}, {self.col})"))
+                return
+            self.typed.append(cell.upper() if self.page == "upper" and cell.isalpha() else cell)
+        elif name == "RT":
+            self.typed.append(" ")
+        elif name in ("Y", "LT"):
+            page = PAGE_CYCLE.get((self.page, name))
+            if page is None:
+                self.errors.append((now, name, f"no page change from {self.page}"))
+                return
+            self.page = page
+            self._busy_until = now + self._timing(name)[1]
+        elif name == "START":
+            # Send the message; the keyboard reopens on its first page
+            self.sent.append("".join(self.typed[self._message_start:]))
+            self._message_start = len(self.typed)
+            self.page = "lower"
+            self._busy_until = now + self.REOPEN_TIME
+
+# Streaming input
+STREAM_CHUNK_SIZE = 4096    # Characters read and planned at a time
+STREAM_READ_AHEAD = 2       # Planned chunks kept ready ahead of typing
+
+def iter_text_chunks(source, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the text of a file path or file object in chunks.
+
+    Paths are memory-mapped and decoded as UTF-8 piece by piece, so the file
+    is never read into memory as a whole. File objects (stdin, pipes) are read
+    as data arrives; binary ones are decoded as UTF-8.
+    """
+    import codecs
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    if isinstance(source, (str, os.PathLike)):
+        import mmap
+        with open(source, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for pos in range(0, len(data), chunk_size):
+                    chunk = decoder.decode(data[pos:pos + chunk_size])
+                    if chunk:
+                        yield chunk
+    else:
+        # read1 returns whatever a pipe has ready instead of waiting for a full chunk
+        read = getattr(source, "read1", None) or source.read
+        while True:
+            data = read(chunk_size)
+            if not data:
+                break
+            chunk = decoder.decode(data) if isinstance(data, bytes) else data
+            if chunk:
+                yield chunk
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+# Message chunking ("chunk_limit" config option): long text is split into
+# messages of at most chunk_limit characters, each sent with the chunk_confirm
+# sequence. The game reopens its keyboard on the chunk_layout page.
+chunk_limit = 0
+chunk_confirm = ("START", 1.0)
+chunk_layout = "lower"
+SEQUENCE_INPUTS = ("A", "B", "X", "Y", "START", "LT", "RT")
+
+def set_chunking(limit, confirm=None, layout=None):
+    """Set the message length limit (0 = off), confirm sequence and reopen page"""
+    global chunk_limit, chunk_confirm, chunk_layout
+    chunk_limit = max(0, int(limit or 0))
+    if confirm is not None:
+        steps = []
+        for step in confirm:
+            if isinstance(step, (int, float)) and not isinstance(step, bool) and step >= 0:
+                steps.append(float(step))
+            elif step in SEQUENCE_INPUTS:
+                steps.append(step)
+            else:
+                print(f"Warning: Ignoring unknown confirm step {step!r}")
+        chunk_confirm = tuple(steps)
+    if layout is not None:
+        if layout in layout_pages:
+            chunk_layout = layout
+        else:
+            print(f"Warning: Unknown keyboard page '{layout}', using '{chunk_layout}'")
+
+def split_messages(pieces, limit):
+    """Split text into messages of at most `limit` characters at word boundaries.
+
+    pieces is a string or an iterable of strings such as iter_text_chunks().
+    Line breaks always end a message, runs of whitespace become one space and
+    words longer than a message are split.
+    """
+    if isinstance(pieces, str):
+        pieces = (pieces,)
+    message = ""
+    word = ""
+
+    def place(word):
+        nonlocal message
+        while len(word) > limit:
+            if message:
+                yield message
+                message = ""
+            yield word[:limit]
+            word = word[limit:]
+        if message and len(message) + 1 + len(word) > limit:
+            yield message
+            message = ""
+        message = f"{message} {word}" if message else word
+
+    for piece in itertools.chain(pieces, ("\n",)):
+        for ch in piece:
+            if not ch.isspace():
+                word += ch
+                continue
+            if word:
+                yield from place(word)
+                word = ""
+            if ch == "\n" and message:
+                yield message
+                message = ""
+
+def plan_end_state(plan, start):
+    """Return the (layout, row, col) the cursor is left at after typing a plan"""
+    for step in reversed(plan):
+        if step is not None and step != SPACE_KEY:
+            return step
+    return start
+
+def simulate_typing(text_to_type, language=None, pad=None, **options):
+    """Type text into a SimulatedKeyboard with the normal planner and controls.
+
+    Options are passed to SimulatedKeyboard, which is driven by `pad` (a new
+    PadEngine by default). Returns the simulator; its received() text and
+    errors show what the game would have got.
+    """
+    if language is not None:
+        set_language(language)
+    sim = SimulatedKeyboard(**options)
+    pad = pad or PadEngine()
+    pad.set_backend(sim)
+    pad.init_gamepad()
+    pad.assume_state("lower", 0, 0)
+    pad.type_text(text_to_type, cache=False)
+    return sim
 
 # Configuration management
 APP_NAME = "ac_type"
@@ -460,13 +2134,38 @@ except Exception as e:
     print(f"Warning: Could not ensure config directory {CONFIG_ROOT}: {e}")
 CONFIG_FILE = CONFIG_ROOT / DEFAULT_CONFIG_FILENAME
 LEGACY_CONFIG_FILE = Path(DEFAULT_CONFIG_FILENAME)
+TRACE_DIR = CONFIG_ROOT / "traces"
+LAYOUT_PACK_DIR = CONFIG_ROOT / "layouts"
+LAYOUT_CACHE_DIR = LAYOUT_PACK_DIR / "cache"
+PLAN_CACHE_DIR = CONFIG_ROOT / "plans"
+
+load_layout_packs()
+# Default to German layouts (backward compatibility)
+activate_layout_pack(layout_packs["german"])
+
+plan_cache = PlanCache(PLAN_CACHE_DIR)
 
 def load_config():
     """Load configuration from file"""
     default_config = {
         "keybind": "f1",  # Default keybind
         "language": "english",  # Default language
-        "typing_speed": 1.0
+        "typing_speed": 1.0,
+        "cursor_wrap": False,
+        "diagonal_moves": False,
+        "hold_repeat": False,
+        "repeat_delay": REPEAT_DELAY,
+        "repeat_interval": REPEAT_INTERVAL,
+        "frame_sync": False,
+        "frame_rate": 60,
+        "timing_profile": "",
+        "coalesce_reports": False,
+        "chunk_limit": 0,
+        "chunk_confirm": list(chunk_confirm),
+        "chunk_layout": chunk_layout,
+        "trace": False,
+        "transliterations": {},
+        "plan_cache": True
     }
 
     config_path = None
@@ -486,6 +2185,11 @@ def load_config():
                     config["language"] = default_config["language"]
                 if "typing_speed" not in config:
                     config["typing_speed"] = default_config["typing_speed"]
+                for key in ("cursor_wrap", "diagonal_moves", "hold_repeat", "repeat_delay", "repeat_interval",
+                            "frame_sync", "frame_rate", "timing_profile", "coalesce_reports",
+                            "chunk_limit", "chunk_confirm", "chunk_layout", "trace", "transliterations", "plan_cache"):
+                    if key not in config:
+                        config[key] = default_config[key]
 
                 # Migrate legacy config if necessary
                 if config_path == LEGACY_CONFIG_FILE and CONFIG_FILE != LEGACY_CONFIG_FILE:
@@ -502,26 +2206,713 @@ def load_config():
 
     return default_config.copy()
 
-def save_config(keybind=None, language=None, typing_speed=None):
-    """Save configuration to file"""
+class ConfigStore:
+    """The configuration, loaded once and written back in the background.
+
+    update() changes values in memory and schedules a write SAVE_DELAY seconds
+    later; further changes in that time push the write back, so dragging the
+    speed slider saves once after it stops. The file is written to a temporary
+    file that then replaces the config, so it is never left half written.
+    flush() writes pending changes right away.
+    """
+
+    SAVE_DELAY = 0.5
+
+    def __init__(self, path=CONFIG_FILE):
+        self.path = Path(path)
+        self.data = None
+        self.dirty = False
+        self.timer = None
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+
+    def load(self):
+        """Return the configuration dict, reading the file on first use"""
+        with self.lock:
+            if self.data is None:
+                self.data = load_config()
+            return self.data
+
+    def update(self, **values):
+        """Change settings in memory and schedule a write"""
+        config = self.load()
+        with self.lock:
+            config.update(values)
+            self.dirty = True
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = threading.Timer(self.SAVE_DELAY, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """Write pending changes to disk now"""
+        with self.write_lock:
+            with self.lock:
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+                if not self.dirty:
+                    return True
+                snapshot = json.dumps(self.data, indent=2)
+                self.dirty = False
+            temp_path = self.path.with_name(self.path.name + ".tmp")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    f.write(snapshot)
+                os.replace(temp_path, self.path)
+                return True
+            except Exception as e:
+                print(f"Error saving configuration: {e}")
+                return False
+
+config_store = ConfigStore()
+# Write anything still pending when the program exits
+atexit.register(config_store.flush)
+
+def save_config(keybind=None, language=None, typing_speed=None, timing_profile=None):
+    """Save configuration changes (written in the background by config_store)"""
+    values = {}
+    if keybind is not None:
+        values["keybind"] = keybind.lower() if keybind else "f1"
+    if language is not None:
+        values["language"] = language
+    if typing_speed is not None:
+        values["typing_speed"] = typing_speed
+    if timing_profile is not None:
+        values["timing_profile"] = timing_profile
+    config_store.update(**values)
+    return True
+
+def apply_config(config):
+    """Apply the language, speed and input settings from a loaded config"""
+    set_language(config.get("language", "german"))
+    set_frame_sync(config.get("frame_sync", False), config.get("frame_rate", 60))
+    if config.get("timing_profile"):
+        load_timing_profile(config["timing_profile"])
+    set_coalesce_reports(config.get("coalesce_reports", False))
+    set_speed(float(config.get("typing_speed", 1.0)))
+    set_cursor_wrap(config.get("cursor_wrap", False))
+    set_diagonal_moves(config.get("diagonal_moves", False))
+    set_hold_repeat(config.get("hold_repeat", False), config.get("repeat_delay"), config.get("repeat_interval"))
+    set_chunking(config.get("chunk_limit", 0), config.get("chunk_confirm"), config.get("chunk_layout"))
+    set_tracing(config.get("trace", False))
+    set_transliterations(config.get("transliterations"))
+    set_plan_caching(config.get("plan_cache", True))
+
+# Timing calibration
+TIMING_PROFILE_FILE = CONFIG_ROOT / "ac_type_timing.json"
+
+# Probe typed for every calibration step: repeated keys, double spaces, case
+# and symbol switches and long cursor runs exercise every timing value.
+CALIBRATION_TEXT = "Hello, World! aa  ss #?# ZAP qp 2 Quiet zebras jump 90."
+
+def load_timing_profile(path):
+    """Load a timing profile written by calibrate_timing and apply it"""
     try:
-        config = load_config()
-
-        if keybind is not None:
-            config["keybind"] = keybind.lower() if keybind else "f1"
-        if language is not None:
-            config["language"] = language
-        if typing_speed is not None:
-            config["typing_speed"] = typing_speed
-
-        CONFIG_ROOT.mkdir(parents=True, exist_ok=True)
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2)
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+        set_timing_profile(profile.get("timings", {}))
         return True
     except Exception as e:
-        print(f"Error saving configuration: {e}")
+        print(f"Error loading timing profile {path}: {e}")
         return False
 
+def save_timing_profile(timings, path, **info):
+    """Write a timing profile that load_timing_profile can read"""
+    profile = dict(info)
+    profile["timings"] = {key: round(value, 4) for key, value in timings.items()}
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+
+def calibrate_timing(language=None, min_timings=None, margin=1.15, resolution=0.001, probe=None):
+    """Search the smallest safe base value of every action timing.
+
+    The target is the keyboard simulator, optionally with recorded minimum
+    (hold, settle) times per input as min_timings. Each timing is binary
+    searched on its own while the others keep their current values; a value
+    passes when the probe text arrives complete with no dropped input. The
+    minimums are then scaled by `margin` (raised until the combined profile
+    passes) and returned as a {timing key: seconds} dict.
+    """
+    saved = (dict(timing_profile), speed_scale, frame_sync, current_language)
+    if language is not None:
+        set_language(language)
+    probe = "".join(ch for ch in (probe or CALIBRATION_TEXT) if ch == " " or ch in char_index)
+    try:
+        set_frame_sync(False)
+        set_speed(1.0)
+        current = base_timings()
+
+        def passes(timings):
+            set_timing_profile(timings)
+            sim = simulate_typing(probe, min_timings=min_timings)
+            return sim.received() == probe and not sim.errors
+
+        if not passes(current):
+            raise RuntimeError("the probe text fails even with the current timing")
+
+        minimums = {}
+        for key in TIMING_PROFILE_KEYS:
+            low, high = 0.0, current[key]
+            while high - low > resolution:
+                trial = dict(current)
+                trial[key] = (low + high) / 2
+                if passes(trial):
+                    high = trial[key]
+                else:
+                    low = trial[key]
+            minimums[key] = high
+
+        while True:
+            tuned = {key: min(current[key], minimums[key] * margin) for key in TIMING_PROFILE_KEYS}
+            if passes(tuned) or tuned == current:
+                return tuned
+            margin += 0.05
+    finally:
+        set_timing_profile(saved[0])
+        set_frame_sync(saved[2])
+        set_speed(saved[1])
+        set_language(saved[3])
+
+def run_calibration(args):
+    """Command-line entry point for `ac_type.py calibrate`"""
+    config = config_store.load()
+    language = args.lang or config.get("language", "english")
+    min_timings = None
+    if args.target:
+        with open(args.target, "r", encoding="utf-8") as f:
+            min_timings = {name: tuple(values) for name, values in json.load(f).get("min_timings", {}).items()}
+    print(f"Calibrating {language} timings against the {'recorded profile' if args.target else 'simulator'}...")
+    try:
+        timings = calibrate_timing(language, min_timings, margin=args.margin)
+    except RuntimeError as e:
+        print(f"Calibration failed: {e}")
+        return 1
+    defaults = base_timings()
+    for key in TIMING_PROFILE_KEYS:
+        print(f"  {key:<15} {defaults[key] * 1000:7.1f}ms -> {timings[key] * 1000:7.1f}ms")
+    save_timing_profile(timings, args.output, language=language, target=args.target or "simulator", margin=args.margin)
+    print(f"Timing profile saved to {args.output}")
+    # The simulator's minimums are assumptions, so only use its results when asked to
+    if args.target or args.activate:
+        save_config(timing_profile=str(args.output))
+        print("Timing profile activated")
+    else:
+        print("Not activated: these timings come from the simulator's assumed minimums, not from the game. "
+              "Pass --activate to use them anyway.")
+    return 0
+
+# Benchmark
+BENCHMARK_CORPUS = {
+    "chat": "hi! want to trade fruit? meet me at the dock in 5",
+    "letter": (
+        "Dear Tom Nook, thank you for the loan. I paid off 98,000 Bells today and the house "
+        "looks great. The museum got 3 new fossils, so come and see them! Love, Ann"
+    ),
+    "password": "isc74NV1Y#zoI4I5X@qSEdcEKbOV",
+    "symbols": "#1 (a+b) <c> = 50% & @home: ~ok? \"yes\"; x/y - z_",
+}
+
+def run_benchmark(languages=("german", "english"), corpus=None, **sim_options):
+    """Type every corpus text in every language on the simulator and collect the counters.
+
+    Returns one result dict per (language, text) with input counts, the
+    simulated typing time and whether the game received the text intact.
+    """
+    results = []
+    saved_language = current_language
+    try:
+        for language in languages:
+            set_language(language)
+            for name, text_to_type in (corpus or BENCHMARK_CORPUS).items():
+                expected = "".join(ch for ch in text_to_type if ch == " " or ch in char_index)
+                pad = PadEngine()
+                sim = simulate_typing(text_to_type, pad=pad, **sim_options)
+                counts = pad.action_counts
+                results.append({
+                    "language": language,
+                    "text": name,
+                    "chars": len(text_to_type),
+                    "moves": counts["moves"],
+                    "presses": sum(counts[key] for key in ("A", "space", "Y", "LT")),
+                    "layout_switches": counts["layout_switches"],
+                    "reports": counts["reports"],
+                    "reports_saved": counts["reports_saved"],
+                    "seconds": sim.now,
+                    "ms_per_char": sim.now * 1000 / max(len(text_to_type), 1),
+                    "ok": sim.received() == expected and not sim.errors,
+                })
+    finally:
+        set_language(saved_language)
+    return results
+
+def run_benchmark_command(args):
+    """Command-line entry point for `ac_type.py benchmark`"""
+    set_cursor_wrap(args.wrap)
+    set_diagonal_moves(args.diagonal)
+    set_hold_repeat(args.hold_repeat)
+    set_frame_sync(args.frame_sync, args.frame_rate)
+    set_coalesce_reports(args.coalesce)
+    if args.profile:
+        load_timing_profile(args.profile)
+    set_speed(args.speed)
+
+    results = run_benchmark(args.lang)
+    print(f"{'lang':<8} {'text':<9} {'chars':>5} {'moves':>6} {'presses':>7} {'switches':>8} "
+          f"{'reports':>7} {'saved':>6} {'time':>8} {'ms/char':>8}  ok")
+    for r in results:
+        print(f"{r['language']:<8} {r['text']:<9} {r['chars']:>5} {r['moves']:>6} {r['presses']:>7} "
+              f"{r['layout_switches']:>8} {r['reports']:>7} {r['reports_saved']:>6} {r['seconds']:>7.2f}s "
+              f"{r['ms_per_char']:>8.1f}  "
+              f"{'yes' if r['ok'] else 'NO'}")
+    total_chars = sum(r["chars"] for r in results)
+    total_seconds = sum(r["seconds"] for r in results)
+    print(f"Total: {total_seconds:.2f}s for {total_chars} characters ({total_seconds * 1000 / max(total_chars, 1):.1f} ms/char)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(r["ok"] for r in results) else 1
+
+def make_backend(kind, real_time=False):
+    """Create a gamepad backend for the command-line tools ("vgamepad" or "sim")
+
+    The simulator runs on its virtual clock unless real_time is set."""
+    if kind == "sim":
+        return SimulatedKeyboard(virtual_time=not real_time)
+    return VGamepadBackend()
+
+def run_type_command(args):
+    """Command-line entry point for `ac_type.py type`: type text without the GUI"""
+    if args.stream:
+        if args.file:
+            text_to_type = iter_text_chunks(args.file)
+        elif args.text is not None and args.text != "-":
+            text_to_type = [args.text]
+        else:
+            text_to_type = iter_text_chunks(sys.stdin.buffer)
+    elif args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            text_to_type = f.read()
+    elif args.text is not None and args.text != "-":
+        text_to_type = args.text
+    else:
+        text_to_type = sys.stdin.read()
+    if not args.stream:
+        text_to_type = text_to_type.strip()
+        if not text_to_type:
+            print("Error: No text to type!")
+            return 1
+
+    apply_config(config_store.load())
+    if args.lang:
+        set_language(args.lang)
+    if args.speed is not None:
+        set_speed(args.speed)
+    if args.chunk is not None:
+        set_chunking(args.chunk)
+    if args.trace:
+        engine.tracer = ActionTracer()
+
+    # Transliterate before any input is sent and say up front what will be lost
+    dropped = Counter()
+    newline = "\n" if chunk_limit else " "
+    if args.stream:
+        text_to_type = (prepare_text(chunk, newline, dropped) for chunk in text_to_type)
+    else:
+        text_to_type = prepare_text(text_to_type, newline, dropped)
+        if dropped:
+            print(describe_dropped(dropped))
+        if not text_to_type.strip():
+            print("Error: No typeable characters!")
+            return 1
+
+    try:
+        engine.set_backend(make_backend(args.backend, args.real_time))
+    except Exception as e:
+        print(f"ERROR initializing gamepad: {e}")
+        return 1
+    if not engine.init_gamepad():
+        return 1
+    startup = time.perf_counter() - PROCESS_START
+    over_budget = f" - over the {STARTUP_BUDGET * 1000:.0f}ms budget" if startup > STARTUP_BUDGET else ""
+    print(f"Gamepad ready {startup * 1000:.0f}ms after startup{over_budget}")
+    if args.wait:
+        time.sleep(args.wait)
+
+    try:
+        if args.assume_home:
+            engine.assume_state()
+        engine.ensure_state()
+        if chunk_limit:
+            def on_message(index, message, seconds):
+                print(f"Message {index + 1}: {len(message)} characters in {seconds:.2f}s")
+            messages = split_messages(text_to_type, chunk_limit)
+            if not args.stream:
+                messages = list(messages)
+                text_to_type = "".join(messages)
+            typed = engine.type_messages(messages, on_message=on_message)
+        elif args.stream:
+            typed = engine.type_stream(text_to_type)
+        else:
+            typed = engine.type_text(text_to_type)
+        if args.stream and dropped:
+            print(describe_dropped(dropped))
+        if isinstance(engine.gamepad, SimulatedKeyboard):
+            print(f"Simulator received: {engine.gamepad.received()}")
+            if engine.gamepad.errors:
+                print(f"Simulator dropped {len(engine.gamepad.errors)} inputs (typing too fast?)")
+    except KeyboardInterrupt:
+        print("\nTyping stopped by user.")
+        return 130
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
+        return 1
+    finally:
+        engine.disconnect_gamepad()
+
+    if args.trace:
+        json_path, csv_path = engine.tracer.export(args.trace)
+        print(f"Trace saved to {json_path} and {csv_path}")
+    timing = engine.scheduler.report()
+    total = typed if args.stream else len(text_to_type)
+    print(f"Typed {typed}/{total} characters in {timing['actual']:.2f}s (target {timing['target']:.2f}s)")
+    return 0
+
+# Job server
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_PROGRESS_INTERVAL = 0.25    # Minimum seconds between progress events of a job
+
+class TypingJob:
+    """A queued typing request and the client connection its events go to"""
+
+    def __init__(self, job_id, text, language=None, speed=None, send=None):
+        self.id = job_id
+        self.text = text
+        self.language = language
+        self.speed = speed
+        self.send = send or (lambda event: None)
+        self.finished = threading.Event()
+
+class PadPool:
+    """Worker threads that type queued jobs, one per pad.
+
+    Every pad is connected when the pool starts, so jobs don't pay the
+    controller's connect latency, and each worker takes the next job as soon
+    as its pad is free. Language and speed are module-wide settings shared by
+    all pads: the pool applies its own once when it starts, and jobs may only
+    change them when the pool has a single pad, so the workers never change
+    them while another pad is typing. A pad's keyboard is only
+    homed when its state isn't known, so consecutive jobs on it continue from
+    where the last one left the cursor.
+    """
+
+    def __init__(self, pads, language="german", speed=1.0):
+        import queue
+        self.pads = pads
+        self.jobs = queue.Queue()
+        self.language = language
+        self.speed = speed
+        self.workers = []
+
+    def connect(self):
+        """Connect every pad, returning False if one fails"""
+        for pad in self.pads:
+            if not pad.init_gamepad(announce=False):
+                return False
+        print(f"{len(self.pads)} gamepad(s) registered - map XInput/0 to XInput/{len(self.pads) - 1} in the Dolphin instances")
+        return True
+
+    def start(self):
+        self.apply_settings(self.language, self.speed)
+        for index, pad in enumerate(self.pads):
+            worker = threading.Thread(target=self.run_jobs, args=(index, pad), daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        """Let the workers finish their current job, then release every pad"""
+        for _ in self.workers:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        for pad in self.pads:
+            pad.disconnect_gamepad()
+
+    def check(self, language=None, speed=None):
+        """Raise ValueError if a job can't use these settings"""
+        if len(self.pads) > 1 and (language not in (None, self.language) or speed not in (None, self.speed)):
+            raise ValueError("language and speed can only be changed per job with a single pad")
+
+    def apply_settings(self, language, speed):
+        """Switch the shared language and speed, only touching the ones that differ"""
+        if language != current_language:
+            set_language(language)
+        if max(0.1, float(speed)) != speed_scale:
+            set_speed(speed)
+
+    def submit(self, job):
+        """Queue a job and return its position in the queue"""
+        position = self.jobs.qsize()
+        self.jobs.put(job)
+        return position
+
+    def run_job(self, index, pad, job):
+        """Type one job on a pad, sending its events"""
+        last_progress = [0.0]
+        total = 0
+
+        def on_char(typed):
+            now = time.perf_counter()
+            if now - last_progress[0] >= SERVER_PROGRESS_INTERVAL:
+                last_progress[0] = now
+                snapshot = pad.progress.snapshot()
+                job.send({"event": "progress", "job": job.id, "typed": typed, "total": total,
+                          "chars_per_sec": round(snapshot["chars_per_sec"], 2),
+                          "eta": round(snapshot["eta"], 1) if snapshot["eta"] is not None else None})
+
+        try:
+            self.check(job.language, job.speed)
+            self.apply_settings(job.language or self.language,
+                                job.speed if job.speed is not None else self.speed)
+            dropped = Counter()
+            text = prepare_text(job.text, dropped=dropped)
+            total = len(text)
+            job.send({"event": "started", "job": job.id, "pad": index, "length": total,
+                      "dropped": dict(dropped)})
+            pad.ensure_state()
+            typed = pad.type_text(text, on_char=on_char)
+            timing = pad.scheduler.report()
+            job.send({"event": "done", "job": job.id, "pad": index, "typed": typed, "total": total,
+                      "seconds": round(timing["actual"], 3)})
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            job.send({"event": "error", "job": job.id, "error": str(e)})
+        finally:
+            job.finished.set()
+
+    def run_jobs(self, index, pad):
+        """Worker loop: type queued jobs on one pad until None is queued"""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            self.run_job(index, pad, job)
+
+class JobServer:
+    """Local TCP server that queues typing jobs for a PadPool.
+
+    Clients send one JSON object per line, e.g. {"text": "Hello", "language":
+    "english", "speed": 1.2}, and get JSON lines back for each of their jobs:
+    queued, started, progress and done (or error).
+    """
+
+    def __init__(self, pool, host=SERVER_HOST, port=SERVER_PORT):
+        import socketserver
+
+        self.pool = pool
+        self.next_id = 1
+        self.lock = threading.Lock()
+        job_server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                job_server.handle_client(self.rfile, self.wfile)
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = Server((host, port), Handler)
+        self.address = self.server.server_address
+
+    def submit(self, text, language=None, speed=None, send=None):
+        """Queue a job and return it"""
+        with self.lock:
+            job = TypingJob(self.next_id, text, language, speed, send)
+            self.next_id += 1
+            position = self.pool.submit(job)
+        job.send({"event": "queued", "job": job.id, "position": position})
+        return job
+
+    def handle_client(self, rfile, wfile):
+        """Read job requests from one connection until it closes its side"""
+        write_lock = threading.Lock()
+
+        def send(event):
+            line = (json.dumps(event) + "\n").encode("utf-8")
+            with write_lock:
+                try:
+                    wfile.write(line)
+                    wfile.flush()
+                except OSError:
+                    pass  # Client went away; its jobs still run
+
+        jobs = []
+        for line in rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                text = request["text"]
+                language = request.get("language")
+                speed = request.get("speed")
+                if not isinstance(text, str) or not text.strip():
+                    raise ValueError("text must be a non-empty string")
+                if language is not None and language not in layout_packs:
+                    raise ValueError(f"unknown language '{language}'")
+                if speed is not None:
+                    speed = float(speed)
+                self.pool.check(language, speed)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                send({"event": "error", "error": f"bad request: {e}"})
+                continue
+            jobs.append(self.submit(text.strip(), language, speed, send))
+
+        # Keep the connection open until this client's jobs have reported back
+        for job in jobs:
+            job.finished.wait()
+
+    def serve_forever(self):
+        self.pool.start()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.pool.stop()
+
+def run_serve_command(args):
+    """Command-line entry point for `ac_type.py serve`"""
+    config = config_store.load()
+    apply_config(config)
+    if args.lang:
+        set_language(args.lang)
+    if args.speed is not None:
+        set_speed(args.speed)
+    try:
+        pads = [PadEngine(make_backend(args.backend, args.real_time)) for _ in range(max(1, args.pads))]
+    except Exception as e:
+        print(f"ERROR initializing gamepad: {e}")
+        return 1
+    pool = PadPool(pads, current_language, speed_scale)
+    if not pool.connect():
+        return 1
+    if args.assume_home:
+        for pad in pads:
+            pad.assume_state()
+
+    try:
+        job_server = JobServer(pool, args.host, args.port)
+    except OSError as e:
+        print(f"ERROR starting job server: {e}")
+        for pad in pads:
+            pad.disconnect_gamepad()
+        return 1
+    host, port = job_server.address[:2]
+    print(f"Accepting typing jobs on {host}:{port} - press Ctrl+C to stop")
+    try:
+        job_server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nJob server stopped.")
+    return 0
+
+def run_send_command(args):
+    """Command-line entry point for `ac_type.py send`: queue a job and follow its events"""
+    import socket
+
+    text_to_type = args.text if args.text is not None and args.text != "-" else sys.stdin.read()
+    request = {"text": text_to_type}
+    if args.lang:
+        request["language"] = args.lang
+    if args.speed is not None:
+        request["speed"] = args.speed
+    try:
+        conn = socket.create_connection((args.host, args.port))
+    except OSError as e:
+        print(f"ERROR connecting to job server: {e}")
+        return 1
+    with conn, conn.makefile("rb") as events:
+        conn.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        conn.shutdown(socket.SHUT_WR)
+        status = 1
+        for line in events:
+            event = json.loads(line)
+            print(json.dumps(event))
+            if event["event"] == "done":
+                status = 0
+    return status
+
+def parse_args(argv=None):
+    """Parse command-line arguments; no command starts the GUI"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="ac_type", description="Type text into Animal Crossing through a virtual gamepad.")
+    commands = parser.add_subparsers(dest="command")
+
+    type_cmd = commands.add_parser("type", help="type text without opening the GUI")
+    type_cmd.add_argument("text", nargs="?", help="text to type (default: read from --file or stdin)")
+    type_cmd.add_argument("--file", help="UTF-8 text file to type")
+    type_cmd.add_argument("--lang", choices=sorted(layout_packs), help="keyboard language (default: from config)")
+    type_cmd.add_argument("--speed", type=float, help="typing speed multiplier (default: from config)")
+    type_cmd.add_argument("--stream", action="store_true",
+                          help="read and plan the text in chunks while typing (for very large input)")
+    type_cmd.add_argument("--chunk", type=int, metavar="CHARS",
+                          help="split the text into messages of at most CHARS characters and send each (0 = off, default: from config)")
+    type_cmd.add_argument("--trace", metavar="PATH",
+                          help="record every input and save PATH.json (Chrome trace) and PATH.csv")
+    type_cmd.add_argument("--wait", type=float, default=0.0, help="seconds to wait after connecting before typing")
+    type_cmd.add_argument("--backend", choices=("vgamepad", "sim"), default="vgamepad",
+                          help="send input to the virtual gamepad or the keyboard simulator")
+    type_cmd.add_argument("--real-time", action="store_true",
+                          help="run the keyboard simulator on the real clock instead of its virtual one")
+    type_cmd.add_argument("--assume-home", action="store_true",
+                          help="the cursor is on the first key of the lowercase page; don't home it (needed when the keyboard wraps)")
+
+    serve = commands.add_parser("serve", help="accept typing jobs from local programs over TCP")
+    serve.add_argument("--host", default=SERVER_HOST, help=f"address to listen on (default: {SERVER_HOST})")
+    serve.add_argument("--port", type=int, default=SERVER_PORT, help=f"port to listen on (default: {SERVER_PORT})")
+    serve.add_argument("--lang", choices=sorted(layout_packs), help="default keyboard language (default: from config)")
+    serve.add_argument("--speed", type=float, help="default typing speed multiplier (default: from config)")
+    serve.add_argument("--pads", type=int, default=1,
+                       help="number of virtual gamepads to connect and type on in parallel (default: 1)")
+    serve.add_argument("--backend", choices=("vgamepad", "sim"), default="vgamepad",
+                       help="send input to the virtual gamepad or the keyboard simulator")
+    serve.add_argument("--real-time", action="store_true",
+                       help="run the keyboard simulator on the real clock instead of its virtual one")
+    serve.add_argument("--assume-home", action="store_true",
+                       help="the cursor is on the first key of the lowercase page; don't home it (needed when the keyboard wraps)")
+
+    send = commands.add_parser("send", help="queue text on a running job server and print its progress")
+    send.add_argument("text", nargs="?", help="text to type (default: read from stdin)")
+    send.add_argument("--host", default=SERVER_HOST, help=f"job server address (default: {SERVER_HOST})")
+    send.add_argument("--port", type=int, default=SERVER_PORT, help=f"job server port (default: {SERVER_PORT})")
+    send.add_argument("--lang", choices=sorted(layout_packs), help="keyboard language for this text")
+    send.add_argument("--speed", type=float, help="typing speed multiplier for this text")
+
+    calibrate = commands.add_parser("calibrate", help="find minimal safe per-action timings and save them as a profile")
+    calibrate.add_argument("--lang", choices=sorted(layout_packs), help="keyboard language (default: from config)")
+    calibrate.add_argument("--target", help="JSON file with recorded minimum timings: {\"min_timings\": {\"A\": [hold, settle], ...}}")
+    calibrate.add_argument("--margin", type=float, default=1.15, help="safety factor applied to the minimums (default: 1.15)")
+    calibrate.add_argument("--output", default=str(TIMING_PROFILE_FILE), help="where to write the timing profile")
+    calibrate.add_argument("--activate", action="store_true",
+                           help="use the profile even though it was calibrated against the simulator (a --target profile is always used)")
+
+    benchmark = commands.add_parser("benchmark", help="measure typing throughput over a message corpus on the simulator")
+    benchmark.add_argument("--lang", nargs="+", choices=sorted(layout_packs), default=["german", "english"])
+    benchmark.add_argument("--speed", type=float, default=1.0, help="typing speed multiplier (default: 1.0)")
+    benchmark.add_argument("--profile", help="timing profile to benchmark with")
+    benchmark.add_argument("--wrap", action="store_true", help="let the cursor wrap around the keyboard edges")
+    benchmark.add_argument("--diagonal", action="store_true", help="use diagonal stick moves")
+    benchmark.add_argument("--hold-repeat", action="store_true", help="hold the stick for long runs")
+    benchmark.add_argument("--frame-sync", action="store_true", help="time inputs in whole frames")
+    benchmark.add_argument("--frame-rate", type=int, default=60, choices=FRAME_RATES)
+    benchmark.add_argument("--coalesce", action="store_true", help="merge releases into the next input's report")
+    benchmark.add_argument("--json", help="also write the results to this JSON file")
+    return parser.parse_args(argv)
+
 # GUI Application
 class TypeApp:
     def __init__(self, root):
@@ -591,15 +2982,14 @@ class TypeApp:
         self.stop_thread = False
         
         # Load configuration
-        self.config = load_config()
+        self.config = config_store.load()
         self.keybind = self.config.get("keybind", "f1")
         self.language = self.config.get("language", "german")
         self.typing_speed = float(self.config.get("typing_speed", 1.0))
         self.waiting_for_keybind = False
         
-        # Set language on startup
-        set_language(self.language)
-        set_speed(self.typing_speed)
+        # Set language, speed and input settings on startup
+        apply_config(self.config)
         
         # Create GUI
         self.create_widgets(self.scrollable_frame)
@@ -618,7 +3008,7 @@ class TypeApp:
     
     def connect_gamepad_on_startup(self):
         """Connect gamepad when GUI starts"""
-        if init_gamepad():
+        if engine.init_gamepad():
             self.update_gamepad_status(True)
         else:
             self.update_gamepad_status(False)
@@ -649,7 +3039,8 @@ class TypeApp:
             self.canvas.unbind("<Configure>")
         except Exception:
             pass
-        disconnect_gamepad()
+        engine.disconnect_gamepad()
+        config_store.flush()
         self.root.destroy()
         
     def _on_mousewheel(self, event):
@@ -876,25 +3267,17 @@ class TypeApp:
             "activeforeground": TEXT_PRIMARY
         }
 
-        german_radio = tk.Radiobutton(
-            language_radio_frame,
-            text="German",
-            variable=self.language_var,
-            value="german",
-            **radio_kwargs,
-            command=self.on_language_change
-        )
-        german_radio.pack(side=tk.LEFT, padx=5)
-        
-        english_radio = tk.Radiobutton(
-            language_radio_frame,
-            text="English",
-            variable=self.language_var,
-            value="english",
-            **radio_kwargs,
-            command=self.on_language_change
-        )
-        english_radio.pack(side=tk.LEFT, padx=5)
+        # One button per layout pack
+        for name, pack in layout_packs.items():
+            language_radio = tk.Radiobutton(
+                language_radio_frame,
+                text=pack["title"],
+                variable=self.language_var,
+                value=name,
+                **radio_kwargs,
+                command=self.on_language_change
+            )
+            language_radio.pack(side=tk.LEFT, padx=5)
 
         # Typing speed section
         speed_frame = tk.Frame(settings_frame, bg=SECONDARY_BG)
@@ -999,9 +3382,8 @@ class TypeApp:
             self.language = new_language
             set_language(new_language)
             save_config(language=new_language)
-            # Reset state to apply new layout
-            if not self.running:
-                reset_state()
+            # Home with the new layout before the next run, without sending input now
+            engine.forget_state()
     
     def on_speed_change(self, value):
         """Handle typing speed slider change"""
@@ -1077,7 +3459,7 @@ class TypeApp:
                 
                 # Update button text if not currently typing
                 if not self.running:
-                    self.root.after(0, lambda: self.start_button.config(text=f"Start Typing ({self.keybind.upper()})"))
+                    self.root.after(0, self.update_start_button)
                 
                 # Clear status after 2 seconds
                 self.root.after(2000, lambda: self.keybind_status_label.config(text="", fg=TEXT_MUTED))
@@ -1106,22 +3488,53 @@ class TypeApp:
         if not text_to_type:
             self.status_label.config(text="Error: No text entered!", fg=ERROR_COLOR)
             return
+        dropped = Counter()
+        text_to_type = prepare_text(text_to_type, "\n" if chunk_limit else " ", dropped)
+        if not text_to_type.strip():
+            self.status_label.config(text="Error: No typeable characters!", fg=ERROR_COLOR)
+            return
+        # Let a stopped run finish its last character and save its checkpoint first
+        if self.typing_thread is not None and self.typing_thread.is_alive():
+            self.root.after(50, self.start_typing)
+            return
+        run = list(split_messages(text_to_type, chunk_limit)) if chunk_limit else text_to_type
+        # Continue an interrupted run of the same text instead of starting over
+        resume = engine.checkpoint is not None and engine.checkpoint["run"] == run
         
         self.running = True
-        self.current_index = 0
+        self.current_index = engine.checkpoint["typed"] if resume else 0
         self.stop_thread = False
         self.start_button.config(
             text=f"Stop Typing ({self.keybind.upper()})",
             bg=STOP_COLOR,
             activebackground=STOP_COLOR_DARK
         )
-        self.status_label.config(text="TYPING...", fg=SUCCESS_COLOR)
+        status = f"RESUMING at character {self.current_index + 1}..." if resume else "TYPING..."
+        if dropped:
+            print(describe_dropped(dropped))
+            self.status_label.config(text=f"{status} ({sum(dropped.values())} unsupported characters skipped)", fg=WARNING_COLOR)
+        else:
+            self.status_label.config(text=status, fg=SUCCESS_COLOR)
         self.text_input.config(state=tk.DISABLED)
         
         # Start typing in separate thread
-        self.typing_thread = threading.Thread(target=self.typing_loop, args=(text_to_type,), daemon=True)
+        self.typing_thread = threading.Thread(target=self.typing_loop, args=(run, resume), daemon=True)
         self.typing_thread.start()
+        self.root.after(PROGRESS_REFRESH_MS, self.refresh_progress)
+
+    def refresh_progress(self):
+        """Show the typing thread's progress, sampled every PROGRESS_REFRESH_MS while typing"""
+        if not self.running:
+            return
+        self.progress_label.config(text=format_progress(engine.progress.snapshot()))
+        self.root.after(PROGRESS_REFRESH_MS, self.refresh_progress)
     
+    def update_start_button(self):
+        """Offer to resume when the last run was interrupted"""
+        if not self.running:
+            action = "Resume" if engine.checkpoint is not None else "Start"
+            self.start_button.config(text=f"{action} Typing ({self.keybind.upper()})")
+
     def stop_typing(self):
         """Stop typing"""
         self.running = False
@@ -1133,40 +3546,57 @@ class TypeApp:
         )
         self.status_label.config(text="STOPPED", fg=WARNING_COLOR)
         self.text_input.config(state=tk.NORMAL)
-        reset_state()
+        self.update_start_button()
     
     def reset_typing(self):
         """Reset typing state"""
         if self.running:
             self.stop_typing()
+        if self.typing_thread is not None and self.typing_thread.is_alive():
+            self.root.after(50, self.reset_typing)
+            return
         self.current_index = 0
-        reset_state()
+        engine.checkpoint = None
+        self.update_start_button()
+        if layout_wraps("lower"):
+            # A wrapping keyboard can't be homed, so Reset says the cursor is on its first key
+            engine.assume_state()
+        else:
+            engine.forget_state()
         self.status_label.config(text="Reset", fg=WARNING_COLOR)
         self.progress_label.config(text="")
         self.root.after(1000, lambda: self.status_label.config(text="Ready", fg=WARNING_COLOR))
     
-    def typing_loop(self, text_to_type):
-        """Main typing loop running in separate thread"""
+    def typing_loop(self, run, resume=False):
+        """Main typing loop running in separate thread.
+
+        run is the text, or its messages when chunking; with resume the
+        interrupted run in engine.checkpoint is continued.
+        """
         global text
-        text = text_to_type
-        reset_state()
-        
+        messages = run if isinstance(run, list) else None
+        text = "".join(messages) if messages is not None else run
+        total = len(text)
+        if engine.tracer is not None:
+            engine.tracer.clear()
+
+        def on_message(index, message, seconds):
+            print(f"Message {index + 1}/{len(messages)}: {len(message)} characters in {seconds:.2f}s")
+
         try:
-            while self.running and not self.stop_thread:
-                if self.current_index >= len(text):
-                    self.root.after(0, self.typing_complete)
-                    break
-                
-                # Update progress
-                progress = f"{self.current_index + 1}/{len(text)}"
-                self.root.after(0, lambda p=progress: self.progress_label.config(text=p) if hasattr(self, 'progress_label') else None)
-                
-                # Type character
-                next_ch = text[self.current_index + 1] if self.current_index + 1 < len(text) else None
-                type_char(text[self.current_index], next_ch)
-                self.current_index += 1
-                
-                time.sleep(POLL_INTERVAL)
+            should_stop = lambda: not self.running or self.stop_thread
+            if resume:
+                self.current_index = engine.resume(should_stop, on_message=on_message)
+            else:
+                engine.ensure_state()
+                if messages is not None:
+                    self.current_index = engine.type_messages(messages, should_stop, on_message=on_message, total=total)
+                else:
+                    self.current_index = engine.type_text(text, should_stop=should_stop)
+            if self.current_index >= total and self.running and not self.stop_thread:
+                self.root.after(0, self.typing_complete)
+            else:
+                self.root.after(0, self.update_start_button)
         except Exception as e:
             error_msg = f"Error: {str(e)}"
             self.root.after(0, lambda msg=error_msg: self.status_label.config(text=msg, fg=ERROR_COLOR))
@@ -1180,13 +3610,37 @@ class TypeApp:
             bg=ACCENT_COLOR,
             activebackground=ACCENT_COLOR_DARK
         )
-        self.status_label.config(text="DONE!", fg=SUCCESS_COLOR)
+        timing = engine.scheduler.report()
+        print(
+            f"Typing took {timing['actual']:.2f}s (target {timing['target']:.2f}s, "
+            f"avg late {timing['late_avg'] * 1000:.2f}ms, max late {timing['late_max'] * 1000:.2f}ms)"
+        )
+        self.status_label.config(
+            text=f"DONE! {timing['actual']:.2f}s (target {timing['target']:.2f}s)",
+            fg=SUCCESS_COLOR
+        )
+        trace_paths = export_trace(engine)
+        if trace_paths:
+            print(f"Trace saved to {trace_paths[0]} and {trace_paths[1]}")
         self.text_input.config(state=tk.NORMAL)
-        reset_state()
         self.progress_label.config(text="")
 
 # Main
 if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "calibrate":
+        sys.exit(run_calibration(args))
+    if args.command == "benchmark":
+        sys.exit(run_benchmark_command(args))
+    if args.command == "type":
+        sys.exit(run_type_command(args))
+    if args.command == "serve":
+        sys.exit(run_serve_command(args))
+    if args.command == "send":
+        sys.exit(run_send_command(args))
+
+    load_gui_modules()
+    create_gamepad()
     try:
         root = tk.Tk()
         app = TypeApp(root)
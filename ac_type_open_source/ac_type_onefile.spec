@@ -11,6 +11,8 @@ datas += collect_data_files('vgamepad')
 # Include favicon.ico in the bundle
 if os.path.exists('favicon.ico'):
     datas.append(('favicon.ico', '.'))
+# Include the bundled keyboard layout packs
+datas.append(('layouts/*.json', 'layouts'))
 
 a = Analysis(
     ['ac_type.py'],
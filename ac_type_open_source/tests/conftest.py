@@ -0,0 +1,33 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Keep the config, layout pack cache and plan cache out of the real %APPDATA%
+os.environ["APPDATA"] = tempfile.mkdtemp(prefix="ac_type_tests_")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ac_type  # noqa: E402
+
+DEFAULTS = {"repeat_delay": 0.25, "repeat_interval": 0.05}
+
+
+def apply_settings(**settings):
+    """Apply config options on top of the defaults"""
+    ac_type.set_timing_profile({})
+    ac_type.apply_config(dict(DEFAULTS, **settings))
+
+
+def expected_text(text):
+    """What the game should receive: every character the active layouts can type"""
+    return "".join(ch for ch in text if ch == " " or ch in ac_type.char_index)
+
+
+@pytest.fixture(autouse=True)
+def default_settings():
+    """Put the shared typing settings back to their defaults around every test"""
+    apply_settings()
+    yield
+    apply_settings()
@@ -0,0 +1,34 @@
+import pytest
+
+import ac_type
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    config_store = ac_type.ConfigStore(tmp_path / "config.json")
+    monkeypatch.setattr(ac_type, "config_store", config_store)
+    yield config_store
+    if config_store.timer is not None:
+        config_store.timer.cancel()
+
+
+def test_simulator_profile_is_not_activated(tmp_path, store):
+    output = tmp_path / "profile.json"
+    args = ac_type.parse_args(["calibrate", "--lang", "english", "--output", str(output)])
+    assert ac_type.run_calibration(args) == 0
+    assert output.exists()
+    assert store.load()["timing_profile"] == ""
+
+
+def test_simulator_profile_is_activated_on_request(tmp_path, store):
+    output = tmp_path / "profile.json"
+    args = ac_type.parse_args(["calibrate", "--lang", "english", "--output", str(output), "--activate"])
+    assert ac_type.run_calibration(args) == 0
+    assert store.load()["timing_profile"] == str(output)
+
+
+def test_profile_keys_set_the_timings():
+    ac_type.set_timing_profile({"y_settle": 0.2, "button_hold": 0.03, "poll_interval": 1.0})
+    assert ac_type.Y_SETTLE == pytest.approx(0.2)
+    assert ac_type.BUTTON_HOLD == pytest.approx(0.03)
+    assert ac_type.POLL_INTERVAL == pytest.approx(ac_type.BASE_POLL_INTERVAL)
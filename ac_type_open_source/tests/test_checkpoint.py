@@ -0,0 +1,87 @@
+import pytest
+
+import ac_type
+from conftest import apply_settings
+
+
+class FailingKeyboard(ac_type.SimulatedKeyboard):
+    """Simulator whose connection drops on the report that presses `button` for the nth time"""
+
+    def __init__(self, button, nth):
+        super().__init__()
+        self.button = button
+        self.presses_left = nth
+
+    def update(self):
+        if self.presses_left and self._pending[self.button] and not self._sent[self.button]:
+            self.presses_left -= 1
+            if not self.presses_left:
+                self._pending = dict(self._sent)
+                raise RuntimeError("controller unplugged")
+        super().update()
+
+
+def test_text_resumes_after_a_failure():
+    apply_settings(language="english")
+    text = "Hello there, General Kenobi"
+    sim = FailingKeyboard("A", 10)
+    pad = ac_type.PadEngine(sim)
+    pad.init_gamepad(announce=False)
+    pad.ensure_state()
+    with pytest.raises(RuntimeError):
+        pad.type_text(text)
+    done = pad.checkpoint["typed"]
+    assert sim.received() == text[:done]
+    assert 0 < done < len(text)
+
+    assert pad.resume() == len(text)
+    assert pad.checkpoint is None
+    assert sim.errors == []
+    assert sim.received() == text
+
+
+def test_resume_keeps_progress_when_it_fails_again():
+    apply_settings(language="english")
+    text = "one two three four five six"
+    sim = FailingKeyboard("A", 5)
+    pad = ac_type.PadEngine(sim)
+    pad.init_gamepad(announce=False)
+    pad.ensure_state()
+    with pytest.raises(RuntimeError):
+        pad.type_text(text)
+    first = pad.checkpoint["typed"]
+
+    sim.presses_left = 5
+    with pytest.raises(RuntimeError):
+        pad.resume()
+    assert pad.checkpoint["run"] == text
+    assert pad.checkpoint["typed"] > first
+    assert sim.received() == text[:pad.checkpoint["typed"]]
+
+    assert pad.resume() == len(text)
+    assert sim.received() == text
+
+
+@pytest.mark.parametrize("button, nth", [("A", 12), ("START", 1), ("START", 2)])
+def test_messages_resume_after_a_failure(button, nth):
+    apply_settings(language="english", chunk_limit=10)
+    text = "The quick brown fox jumps over the lazy dog again"
+    messages = list(ac_type.split_messages(text, ac_type.chunk_limit))
+    sim = FailingKeyboard(button, nth)
+    pad = ac_type.PadEngine(sim)
+    pad.init_gamepad(announce=False)
+    pad.ensure_state()
+    with pytest.raises(RuntimeError):
+        pad.type_messages(messages)
+    checkpoint = pad.checkpoint
+    assert checkpoint["run"] == messages
+    assert sim.sent == messages[:checkpoint["sent"]]
+    assert sim.received() == "".join(messages)[:checkpoint["typed"]]
+
+    resumed = []
+    assert pad.resume(on_message=lambda index, message, seconds: resumed.append(index)) == len("".join(messages))
+    assert resumed == list(range(checkpoint["sent"], len(messages)))
+    assert pad.checkpoint is None
+    assert sim.errors == []
+    assert sim.sent == messages
+    assert sim.received() == "".join(messages)
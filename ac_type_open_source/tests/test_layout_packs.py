@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+import ac_type
+
+PACK = {
+    "name": "test",
+    "title": "Test",
+    "pages": {"lower": [["a", "b"], ["c", None]], "upper": [["d"]]},
+    "page_cycle": [["lower", "LT", "upper"], ["upper", "Y", "emoji"], ["emoji", "Y", "lower"]],
+    "wrap": {"lower": [False, True]},
+}
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    folder = tmp_path / "cache"
+    monkeypatch.setattr(ac_type, "LAYOUT_CACHE_DIR", folder)
+    return folder
+
+
+def test_shipped_packs_are_loaded():
+    assert {"german", "english"} <= set(ac_type.layout_packs)
+    for pack in ac_type.layout_packs.values():
+        assert pack["format"] == ac_type.LAYOUT_CACHE_FORMAT
+        assert "lower" in pack["pages"]
+
+
+def test_compile_builds_index_and_wrap():
+    compiled = ac_type.compile_layout_pack(PACK)
+    assert compiled["char_index"]["D"] == [["upper", 0, 0]]
+    assert compiled["pages"]["emoji"] == []
+    assert compiled["wrap"]["lower"] == [False, True]
+    assert compiled["wrap"]["upper"] == [False, False]
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"pages": {"upper": [["a"]]}}, "lower"),
+    ({"pages": {"lower": [[1]]}}, "invalid key"),
+    ({"page_cycle": [["lower", "B", "upper"]]}, "page_cycle"),
+    ({"page_cycle": [["lower", "LT", "upper"]]}, "can't be reached"),
+    ({"wrap": {"lower": "yes"}}, "wrap"),
+])
+def test_compile_rejects_broken_packs(change, message):
+    with pytest.raises(ValueError, match=message):
+        ac_type.compile_layout_pack(dict(PACK, **change))
+
+
+def test_compiled_pack_is_cached_by_content_hash(tmp_path, cache_dir):
+    path = tmp_path / "test.json"
+    path.write_text(json.dumps(PACK), encoding="utf-8")
+    first = ac_type.load_layout_pack(path)
+    cached = list(cache_dir.glob("test-*.json"))
+    assert len(cached) == 1
+
+    # The cache is used as long as the file is unchanged
+    data = json.loads(cached[0].read_text(encoding="utf-8"))
+    data["title"] = "From cache"
+    cached[0].write_text(json.dumps(data), encoding="utf-8")
+    assert ac_type.load_layout_pack(path)["title"] == "From cache"
+
+    # Editing the pack compiles it again and drops the old cache
+    path.write_text(json.dumps(dict(PACK, title="Edited")), encoding="utf-8")
+    second = ac_type.load_layout_pack(path)
+    assert second["title"] == "Edited"
+    assert second["hash"] != first["hash"]
+    assert [p.name.rsplit("-", 1)[1] for p in cache_dir.glob("test-*.json")] == [f"{second['hash']}.json"]
+
+
+def test_user_pack_overriding_a_bundled_one_stays_cached(tmp_path, cache_dir, monkeypatch):
+    bundled, user = tmp_path / "bundled", tmp_path / "user"
+    for folder, title in ((bundled, "Bundled"), (user, "User")):
+        folder.mkdir()
+        (folder / "test.json").write_text(json.dumps(dict(PACK, title=title)), encoding="utf-8")
+    monkeypatch.setattr(ac_type, "BUNDLED_LAYOUT_DIR", bundled)
+    monkeypatch.setattr(ac_type, "LAYOUT_PACK_DIR", user)
+    compiled = []
+    compile_layout_pack = ac_type.compile_layout_pack
+    monkeypatch.setattr(ac_type, "compile_layout_pack", lambda data: compiled.append(data) or compile_layout_pack(data))
+    packs = dict(ac_type.layout_packs)
+    try:
+        ac_type.load_layout_packs()
+        assert len(compiled) == 2
+        assert ac_type.layout_packs["test"]["title"] == "User"
+        ac_type.load_layout_packs()
+        assert len(compiled) == 2
+        assert len(list(cache_dir.glob("test-*.json"))) == 2
+    finally:
+        ac_type.layout_packs.clear()
+        ac_type.layout_packs.update(packs)
+
+
+def test_user_pack_is_activated(tmp_path, cache_dir):
+    path = tmp_path / "test.json"
+    path.write_text(json.dumps(PACK), encoding="utf-8")
+    ac_type.layout_packs["test"] = ac_type.load_layout_pack(path)
+    try:
+        ac_type.set_language("test")
+        assert ac_type.LAYOUT_WRAP["lower"] == (False, True)
+        assert ac_type.layout_transition("upper", "lower") == ("Y", "Y")
+        sim = ac_type.simulate_typing("ab cD")
+        assert sim.errors == []
+        assert sim.received() == "ab cD"
+    finally:
+        del ac_type.layout_packs["test"]
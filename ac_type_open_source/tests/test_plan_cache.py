@@ -0,0 +1,78 @@
+import pytest
+
+import ac_type
+from conftest import apply_settings
+
+TEXT = "Dream address: DA-1234-5678-9012"
+START = ("lower", 0, 0)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    plan_cache = ac_type.PlanCache(tmp_path / "plans")
+    monkeypatch.setattr(ac_type, "plan_cache", plan_cache)
+    return plan_cache
+
+
+def test_miss_then_hit(cache):
+    apply_settings(language="english")
+    assert cache.get(TEXT, START) is None
+    plan, durations = ac_type.cached_plan(TEXT, START)
+    assert plan == ac_type.plan_text(TEXT, start=START)
+    hit = cache.get(TEXT, START)
+    assert hit is not None
+    assert hit[0] == plan
+    assert hit[1] == pytest.approx(durations, rel=1e-6)
+
+
+@pytest.mark.parametrize("change", [
+    {"language": "german"},
+    {"typing_speed": 1.5},
+    {"diagonal_moves": True},
+    {"cursor_wrap": True},
+])
+def test_settings_change_misses(cache, change):
+    apply_settings(language="english")
+    ac_type.cached_plan(TEXT, START)
+    apply_settings(**dict({"language": "english"}, **change))
+    assert cache.get(TEXT, START) is None
+
+
+def test_other_start_misses(cache):
+    apply_settings(language="english")
+    ac_type.cached_plan(TEXT, START)
+    assert cache.get(TEXT, ("upper", 1, 1)) is None
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: data[:-3],
+    lambda data: b"XXXX" + data[4:],
+    lambda data: b"",
+])
+def test_corrupt_entry_is_planned_again(cache, damage):
+    apply_settings(language="english")
+    plan, _ = ac_type.cached_plan(TEXT, START)
+    path = cache.path(TEXT, START)
+    path.write_bytes(damage(path.read_bytes()))
+    assert cache.get(TEXT, START) is None
+    assert ac_type.cached_plan(TEXT, START)[0] == plan
+    assert cache.get(TEXT, START)[0] == plan
+
+
+def test_least_recently_used_plans_are_evicted(tmp_path):
+    apply_settings(language="english")
+    cache = ac_type.PlanCache(tmp_path / "plans", max_bytes=4000)
+    texts = [f"message number {i} " * 4 for i in range(20)]
+    for text in texts:
+        plan = ac_type.plan_text(text, start=START)
+        cache.put(text, START, plan, ac_type.plan_durations(plan, START))
+    total = sum(path.stat().st_size for path in (tmp_path / "plans").glob("*.plan"))
+    assert total <= 4000
+    assert cache.get(texts[-1], START) is not None
+    assert cache.get(texts[0], START) is None
+
+
+def test_disabled_cache_writes_nothing(cache):
+    apply_settings(language="english", plan_cache=False)
+    ac_type.cached_plan(TEXT, START)
+    assert not cache.folder.exists() or not list(cache.folder.glob("*.plan"))
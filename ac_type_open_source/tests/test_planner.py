@@ -0,0 +1,101 @@
+import pytest
+
+import ac_type
+from conftest import apply_settings, expected_text
+
+SETTINGS = {
+    "default": {},
+    "wrap": {"cursor_wrap": True},
+    "diagonal": {"diagonal_moves": True},
+    "hold_repeat": {"hold_repeat": True},
+    "coalesce": {"coalesce_reports": True},
+    "frame_sync": {"frame_sync": True},
+    "slowest": {"typing_speed": 0.2},
+    "all": {"cursor_wrap": True, "diagonal_moves": True, "hold_repeat": True,
+            "coalesce_reports": True, "frame_sync": True},
+}
+
+
+@pytest.mark.parametrize("language", ["german", "english"])
+@pytest.mark.parametrize("settings", SETTINGS.values(), ids=SETTINGS.keys())
+def test_corpus_round_trips_through_simulator(language, settings):
+    apply_settings(language=language, **settings)
+    for text in ac_type.BENCHMARK_CORPUS.values():
+        sim = ac_type.simulate_typing(text)
+        assert sim.errors == []
+        assert sim.received() == expected_text(text)
+
+
+@pytest.mark.parametrize("language", ["german", "english"])
+def test_every_key_of_every_page_round_trips(language):
+    apply_settings(language=language, diagonal_moves=True, hold_repeat=True)
+    text = "".join(ch for ch in ac_type.char_index if len(ch) == 1)
+    sim = ac_type.simulate_typing(text)
+    assert sim.errors == []
+    assert sim.received() == text
+
+
+def test_plan_starts_from_given_position():
+    apply_settings(language="english")
+    plan = ac_type.plan_text("a", start=("lower", 2, 0))
+    assert plan == [("lower", 2, 0)]
+    assert ac_type.plan_durations(plan, ("lower", 2, 0))[0] < ac_type.plan_durations(plan, ("lower", 0, 0))[0]
+
+
+def test_untypeable_characters_are_planned_as_none():
+    apply_settings(language="english")
+    assert ac_type.plan_text("aΩ b") == [("lower", 2, 0), None, ac_type.SPACE_KEY, ("lower", 3, 4)]
+
+
+def test_layout_transitions_follow_page_cycle():
+    apply_settings(language="german")
+    assert ac_type.layout_transition("lower", "symbols") == ("LT", "Y")
+    assert ac_type.layout_transition("symbols", "lower") == ("Y", "Y")
+    assert ac_type.layout_transition("symbols", "emoji") == ("Y",)
+    assert ac_type.layout_transition("upper", "upper") == ()
+
+
+def test_prepare_text_transliterates_and_reports_dropped():
+    apply_settings(language="english")
+    dropped = ac_type.Counter()
+    prepared = ac_type.prepare_text("Grüße “ok”… 5€ Ω\nx", dropped=dropped)
+    assert prepared == 'Gruesse "ok"... 5EUR  x'
+    assert dropped == {"Ω": 1}
+
+
+def test_split_messages_respects_limit_and_line_breaks():
+    messages = list(ac_type.split_messages("hello there neighbor\nbye", 12))
+    assert messages == ["hello there", "neighbor", "bye"]
+    assert all(len(message) <= 12 for message in messages)
+
+
+def test_chunked_messages_are_sent_in_simulator():
+    apply_settings(language="english", chunk_limit=12)
+    sim = ac_type.SimulatedKeyboard()
+    pad = ac_type.PadEngine(sim)
+    pad.init_gamepad(announce=False)
+    pad.ensure_state()
+    messages = list(ac_type.split_messages("Hello there, see you at the dock!", 12))
+    pad.type_messages(messages)
+    assert sim.errors == []
+    assert sim.sent == messages
+
+
+def test_wrapping_keyboard_is_not_homed_blindly():
+    apply_settings(language="english", cursor_wrap=True)
+    sim = ac_type.SimulatedKeyboard()
+    pad = ac_type.PadEngine(sim)
+    pad.init_gamepad(announce=False)
+    reports = sim.reports
+    with pytest.raises(RuntimeError, match="can't be homed"):
+        pad.ensure_state()
+    assert sim.reports == reports
+    assert not pad.state_known
+
+    pad.assume_state()
+    pad.ensure_state()
+    assert sim.reports == reports
+    messages = list(ac_type.split_messages("Hello there, see you at the dock!", 12))
+    pad.type_messages(messages)
+    assert sim.errors == []
+    assert sim.sent == messages
@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+import ac_type
+from conftest import apply_settings
+
+
+class FakeClock:
+    """A clock that oversleeps every sleep by `late` seconds"""
+
+    def __init__(self, late):
+        self.now = 0.0
+        self.late = late
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds + self.late
+
+
+def test_late_wakeup_never_shortens_the_next_wait():
+    clock = FakeClock(late=0.004)
+    scheduler = ac_type.DeadlineScheduler()
+    scheduler.use_clock(clock.clock, clock.sleep, spin=False)
+    start = clock.now
+    scheduler.wait(0.02)
+    middle = clock.now
+    scheduler.wait(0.02)
+    assert middle - start >= 0.02
+    assert clock.now - middle >= 0.02
+
+
+def test_catch_up_wait_absorbs_lateness():
+    clock = FakeClock(late=0.004)
+    scheduler = ac_type.DeadlineScheduler()
+    scheduler.use_clock(clock.clock, clock.sleep, spin=False)
+    scheduler.wait(0.02)
+    before = clock.now
+    scheduler.wait(0.003, catch_up=True)
+    assert clock.now == before
+
+
+def test_real_time_typing_respects_minimum_timings():
+    apply_settings(language="english")
+    text = "Hi, Tom! 5 (ok?)"
+    sim = ac_type.simulate_typing(text, virtual_time=False)
+    assert sim.errors == []
+    assert sim.received() == text
+
+
+def test_real_time_coalesced_typing_respects_minimum_timings():
+    apply_settings(language="english", coalesce_reports=True)
+    text = "Hi, Tom! 5 (ok?)"
+    sim = ac_type.simulate_typing(text, virtual_time=False)
+    assert sim.errors == []
+    assert sim.received() == text
+
+
+@pytest.mark.parametrize("rate", ac_type.FRAME_RATES)
+def test_frame_sync_rounds_up_to_fewest_frames(rate):
+    apply_settings(frame_sync=True, frame_rate=rate)
+    frame = 1.0 / rate
+    for name, seconds in (("MOVE_HOLD", ac_type.BASE_MOVE_HOLD), ("BUTTON_HOLD", ac_type.BASE_BUTTON_HOLD),
+                          ("BUTTON_SETTLE", ac_type.BASE_BUTTON_SETTLE), ("Y_SETTLE", ac_type.BASE_LAYOUT_SETTLE)):
+        value = getattr(ac_type, name)
+        assert value >= seconds - 1e-9
+        assert value < seconds + frame
+        assert value * rate == pytest.approx(round(value * rate))
+
+
+def test_frame_sync_round_trips_at_30_hz():
+    apply_settings(language="english", frame_sync=True, frame_rate=30)
+    text = ac_type.BENCHMARK_CORPUS["chat"]
+    sim = ac_type.simulate_typing(text)
+    assert sim.errors == []
+    assert sim.received() == text
+
+
+@pytest.mark.parametrize("rate", ac_type.FRAME_RATES)
+def test_frame_sync_holds_release_between_repeats(rate):
+    apply_settings(hold_repeat=True, frame_sync=True, frame_rate=rate)
+    assert ac_type.MOVE_HOLD < ac_type.REPEAT_DELAY
+    for steps in range(2, 13):
+        hold = ac_type.hold_duration(steps)
+        last_move = ac_type.REPEAT_DELAY + (steps - 2) * ac_type.REPEAT_INTERVAL
+        assert last_move < hold < last_move + ac_type.REPEAT_INTERVAL
+        assert hold * rate == pytest.approx(round(hold * rate))
+
+
+@pytest.mark.parametrize("language", ["german", "english"])
+@pytest.mark.parametrize("rate", ac_type.FRAME_RATES)
+def test_hold_repeat_round_trips_at_every_frame_rate(language, rate):
+    apply_settings(language=language, hold_repeat=True, frame_sync=True, frame_rate=rate)
+    keys = [ch for ch in ac_type.char_index if len(ch) == 1] + [" "]
+    rng = random.Random(rate)
+    text = "".join(rng.choice(keys) for _ in range(300))
+    sim = ac_type.simulate_typing(text)
+    assert sim.errors == []
+    assert sim.received() == text
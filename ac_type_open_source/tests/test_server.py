@@ -0,0 +1,130 @@
+import json
+import socket
+import threading
+
+import ac_type
+from conftest import apply_settings
+
+
+def run_server(pads):
+    pool = ac_type.PadPool(pads, ac_type.current_language, ac_type.speed_scale)
+    assert pool.connect()
+    server = ac_type.JobServer(pool, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def send_jobs(address, requests):
+    with socket.create_connection(address[:2], timeout=30) as conn, conn.makefile("rb") as events:
+        for request in requests:
+            conn.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        conn.shutdown(socket.SHUT_WR)
+        return [json.loads(line) for line in events]
+
+
+def test_job_is_queued_typed_and_done():
+    apply_settings(language="english")
+    sim = ac_type.SimulatedKeyboard()
+    server, thread = run_server([ac_type.PadEngine(sim)])
+    try:
+        events = send_jobs(server.address, [{"text": "Hello, Tom!"}, {"text": "bye"}])
+    finally:
+        server.server.shutdown()
+        thread.join()
+    done = [event for event in events if event["event"] == "done"]
+    assert [event["event"] for event in events if event["job"] == 1][0] == "queued"
+    assert len(done) == 2
+    assert all(event["typed"] == event["total"] for event in done)
+    assert sim.errors == []
+    assert sim.received() == "Hello, Tom!bye"
+
+
+def test_bad_request_is_reported():
+    apply_settings(language="english")
+    server, thread = run_server([ac_type.PadEngine(ac_type.SimulatedKeyboard())])
+    try:
+        events = send_jobs(server.address, [{"text": ""}, {"text": "hi", "language": "klingon"}])
+    finally:
+        server.server.shutdown()
+        thread.join()
+    assert [event["event"] for event in events] == ["error", "error"]
+
+
+def test_jobs_are_spread_over_pads():
+    apply_settings(language="english")
+    sims = [ac_type.SimulatedKeyboard() for _ in range(3)]
+    server, thread = run_server([ac_type.PadEngine(sim) for sim in sims])
+    try:
+        events = send_jobs(server.address, [{"text": f"job {i}"} for i in range(6)])
+    finally:
+        server.server.shutdown()
+        thread.join()
+    assert len([event for event in events if event["event"] == "done"]) == 6
+    assert all(sim.errors == [] for sim in sims)
+    assert sorted("".join(sim.received() for sim in sims)) == sorted("".join(f"job {i}" for i in range(6)))
+
+
+def test_pads_never_change_the_shared_settings(monkeypatch):
+    apply_settings(language="english")
+    sims = [ac_type.SimulatedKeyboard() for _ in range(3)]
+    server, thread = run_server([ac_type.PadEngine(sim) for sim in sims])
+    changed = []
+    monkeypatch.setattr(ac_type, "set_language", lambda lang: changed.append(lang))
+    monkeypatch.setattr(ac_type, "set_speed", lambda scale: changed.append(scale))
+    try:
+        events = send_jobs(server.address, [{"text": f"job {i}", "language": "english"} for i in range(9)]
+                           + [{"text": "faster", "speed": 2.0}])
+    finally:
+        server.server.shutdown()
+        thread.join()
+    assert changed == []
+    assert len([event for event in events if event["event"] == "done"]) == 9
+    assert [event["event"] for event in events if event["event"] == "error"] == ["error"]
+
+
+def test_single_pad_job_settings_are_restored():
+    apply_settings(language="english")
+    sim = ac_type.SimulatedKeyboard()
+    server, thread = run_server([ac_type.PadEngine(sim)])
+    try:
+        events = send_jobs(server.address, [{"text": "Straße", "language": "german", "speed": 0.5},
+                                            {"text": "Hi"}])
+    finally:
+        server.server.shutdown()
+        thread.join()
+    assert len([event for event in events if event["event"] == "done"]) == 2
+    assert sim.errors == []
+    assert ac_type.current_language == "english"
+    assert ac_type.speed_scale == 1.0
+
+
+def test_route_caches_survive_concurrent_clears():
+    apply_settings(language="english", diagonal_moves=True)
+    pages = ("lower", "upper", "symbols", "emoji")
+    stop = threading.Event()
+    failures = []
+
+    def plan():
+        try:
+            while not stop.is_set():
+                for source in pages:
+                    for target in pages:
+                        ac_type.layout_transition(source, target)
+                    grid = ac_type.get_layout(source)
+                    if grid:
+                        ac_type.plan_route(source, 0, 0, len(grid) - 1, len(grid[-1]) - 1)
+        except Exception as e:
+            failures.append(e)
+
+    threads = [threading.Thread(target=plan, daemon=True) for _ in range(4)]
+    for worker in threads:
+        worker.start()
+    try:
+        for _ in range(2000):
+            ac_type.clear_route_caches()
+    finally:
+        stop.set()
+        for worker in threads:
+            worker.join()
+    assert failures == []
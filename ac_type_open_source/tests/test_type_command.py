@@ -0,0 +1,83 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import ac_type
+
+SCRIPT = Path(ac_type.__file__).resolve()
+
+# Run `ac_type.py type` as a fresh process and report which optional modules it loaded
+RUNNER = """
+import runpy, sys
+sys.argv = [sys.argv[1], "type", "--backend", "sim", "Hallo Welt"]
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+except SystemExit as e:
+    code = e.code
+else:
+    code = 0
+print("Loaded:", ",".join(m for m in ("tkinter", "keyboard", "vgamepad") if m in sys.modules))
+sys.exit(code)
+"""
+
+
+def run_type(tmp_path):
+    env = dict(os.environ, APPDATA=str(tmp_path))
+    return subprocess.run([sys.executable, "-c", RUNNER, str(SCRIPT)], env=env, cwd=tmp_path,
+                          capture_output=True, text=True, timeout=60)
+
+
+def test_type_command_meets_startup_budget(tmp_path):
+    # The first run builds the layout pack cache, the second is a normal start
+    for _ in range(2):
+        result = run_type(tmp_path)
+        assert result.returncode == 0, result.stdout + result.stderr
+    assert "Simulator received: Hallo Welt" in result.stdout
+    assert "Loaded: \n" in result.stdout
+    ready = re.search(r"Gamepad ready (\d+)ms after startup", result.stdout)
+    assert ready, result.stdout
+    assert int(ready.group(1)) <= ac_type.STARTUP_BUDGET * 1000
+    assert "budget" not in result.stdout
+
+
+def test_sim_backend_uses_virtual_time(capsys):
+    args = ac_type.parse_args(["type", "--backend", "sim", "--lang", "english", "Hello world " * 20])
+    started = time.perf_counter()
+    assert ac_type.run_type_command(args) == 0
+    assert time.perf_counter() - started < 10
+    assert "Simulator received: " + ("Hello world " * 20).strip() in capsys.readouterr().out
+
+
+def test_real_time_flag():
+    assert ac_type.make_backend("sim").clock is not None
+    assert ac_type.make_backend("sim", real_time=True).clock is None
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    store = ac_type.ConfigStore(tmp_path / "config.json")
+    monkeypatch.setattr(ac_type, "config_store", store)
+    yield store
+    if store.timer is not None:
+        store.timer.cancel()
+
+
+def test_wrapping_keyboard_needs_assume_home(config, capsys):
+    config.load()
+    config.data.update(language="english", cursor_wrap=True)
+    assert ac_type.run_type_command(ac_type.parse_args(["type", "--backend", "sim", "Hi there"])) == 1
+    assert "can't be homed" in capsys.readouterr().out
+    assert ac_type.run_type_command(ac_type.parse_args(["type", "--backend", "sim", "--assume-home", "Hi there"])) == 0
+    assert "Simulator received: Hi there" in capsys.readouterr().out
+
+
+def test_untypeable_text_is_rejected_before_connecting(monkeypatch, capsys):
+    monkeypatch.setattr(ac_type, "make_backend", lambda *args: pytest.fail("the gamepad was connected"))
+    args = ac_type.parse_args(["type", "--backend", "sim", "--lang", "english", "\u03a9\u03a9\u03a9"])
+    assert ac_type.run_type_command(args) == 1
+    assert "No typeable characters" in capsys.readouterr().out